@@ -0,0 +1,170 @@
+import abc
+import json
+import logging
+import os
+import cv2
+import numpy as np
+
+log = logging.getLogger(__name__)
+
+def letterbox(im, new_shape=640, color=(114, 114, 114)):
+    """Resize giữ tỉ lệ rồi thêm viền cho đủ new_shape (số nguyên hoặc (h, w)) như yolov5."""
+    if isinstance(new_shape, int):
+        new_shape = (new_shape, new_shape)
+    h, w = im.shape[:2]
+    r = min(new_shape[0] / h, new_shape[1] / w)
+    nh, nw = int(round(h * r)), int(round(w * r))
+    if (nh, nw) != (h, w):
+        im = cv2.resize(im, (nw, nh), interpolation=cv2.INTER_LINEAR)
+    top = (new_shape[0] - nh) // 2
+    left = (new_shape[1] - nw) // 2
+    im = cv2.copyMakeBorder(im, top, new_shape[0] - nh - top, left, new_shape[1] - nw - left,
+                            cv2.BORDER_CONSTANT, value=color)
+    return im, r, (left, top)
+
+def make_divisible(x, stride=32):
+    return int(np.ceil(x / stride) * stride)
+
+def batch_shape(ims, size, stride=32):
+    """Kích thước (h, w) chung của một batch như AutoShape: cạnh dài mỗi ảnh bằng size,
+    lấy lớn nhất theo từng chiều rồi làm tròn lên bội số của stride."""
+    shapes = [(im.shape[0] * size / max(im.shape[:2]), im.shape[1] * size / max(im.shape[:2])) for im in ims]
+    return tuple(make_divisible(x, stride) for x in np.max(shapes, axis=0))
+
+def nms(boxes, scores, iou_thres):
+    """Non-maximum suppression đơn giản bằng NumPy, trả về chỉ số các box được giữ."""
+    x1, y1, x2, y2 = boxes.T
+    areas = (x2 - x1) * (y2 - y1)
+    order = scores.argsort()[::-1]
+    keep = []
+    while order.size > 0:
+        i = order[0]
+        keep.append(i)
+        xx1 = np.maximum(x1[i], x1[order[1:]])
+        yy1 = np.maximum(y1[i], y1[order[1:]])
+        xx2 = np.minimum(x2[i], x2[order[1:]])
+        yy2 = np.minimum(y2[i], y2[order[1:]])
+        inter = np.clip(xx2 - xx1, 0, None) * np.clip(yy2 - yy1, 0, None)
+        iou = inter / (areas[i] + areas[order[1:]] - inter + 1e-9)
+        order = order[1:][iou <= iou_thres]
+    return np.asarray(keep, dtype=np.int64)
+
+def non_max_suppression(pred, conf_thres=0.25, iou_thres=0.45, max_det=1000):
+    """pred: (N, 5 + nc) gồm xywh, objectness, điểm từng lớp. Trả về (M, 6) x1, y1, x2, y2, conf, cls."""
+    pred = pred[pred[:, 4] > conf_thres]
+    if len(pred) == 0:
+        return np.zeros((0, 6), dtype=np.float32)
+    scores = pred[:, 5:] * pred[:, 4:5]
+    cls = scores.argmax(axis=1)
+    conf = scores[np.arange(len(scores)), cls]
+    mask = conf > conf_thres
+    pred, cls, conf = pred[mask], cls[mask], conf[mask]
+    boxes = np.empty((len(pred), 4), dtype=np.float32)
+    boxes[:, 0] = pred[:, 0] - pred[:, 2] / 2
+    boxes[:, 1] = pred[:, 1] - pred[:, 3] / 2
+    boxes[:, 2] = pred[:, 0] + pred[:, 2] / 2
+    boxes[:, 3] = pred[:, 1] + pred[:, 3] / 2
+    # Dịch box theo lớp để NMS chỉ so sánh các box cùng lớp
+    keep = nms(boxes + cls[:, None] * 4096.0, conf, iou_thres)[:max_det]
+    return np.concatenate([boxes[keep], conf[keep, None], cls[keep, None].astype(np.float32)], axis=1)
+
+class Detections:
+    """Kết quả tối giản tương thích với phần dùng tới của yolov5 Detections (xyxy, names)."""
+
+    def __init__(self, xyxy, names):
+        self.xyxy = xyxy
+        self.names = names
+
+def names_path(model_path):
+    return os.path.splitext(model_path)[0] + ".names.json"
+
+def load_names(model_path):
+    with open(names_path(model_path), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+class ExportedModel(abc.ABC):
+    """Chạy model đã export với tiền xử lý letterbox và NMS bằng NumPy.
+
+    Gọi giống AutoShape: model(img, size=640) hoặc model([img1, img2, ...]).
+    Ảnh được đưa vào nguyên kênh màu như AutoShape nhận từ cv2. Model có kích thước
+    đầu vào động (ONNX export bởi export_models.py) chạy ở `size` được yêu cầu; model
+    kích thước cố định luôn chạy ở kích thước export.
+    """
+
+    dynamic = False
+
+    def __init__(self, model_path, conf=0.25, iou=0.45, size=640):
+        self.names = load_names(model_path)
+        self.conf = conf
+        self.iou = iou
+        self.size = size
+        self.model_path = model_path
+        self.warned_size = False
+
+    @abc.abstractmethod
+    def forward(self, batch):
+        """batch (N, 3, H, W) float32 -> dự đoán (N, anchors, 5 + nc)."""
+
+    def input_size(self, size):
+        if size is None:
+            return self.size
+        if self.dynamic:
+            # Làm tròn lên bội số của stride 32 như AutoShape
+            return make_divisible(size)
+        if size != self.size and not self.warned_size:
+            log.warning("%s has a fixed input size of %d, requested size %d is ignored",
+                        os.path.basename(self.model_path), self.size, size)
+            self.warned_size = True
+        return self.size
+
+    def __call__(self, ims, size=None):
+        single = not isinstance(ims, (list, tuple))
+        ims = [ims] if single else list(ims)
+        if len(ims) == 0:
+            return Detections([], self.names)
+        size = self.input_size(size)
+        # Model động nhận ảnh chữ nhật nên chỉ thêm viền tới kích thước chung của batch,
+        # model kích thước cố định (TorchScript) cần ảnh vuông size x size
+        shape = batch_shape(ims, size) if self.dynamic else (size, size)
+        batch = np.empty((len(ims), 3) + shape, dtype=np.float32)
+        metas = []
+        for i, im in enumerate(ims):
+            padded, r, pad = letterbox(im, shape)
+            batch[i] = padded.transpose(2, 0, 1) / 255.0
+            metas.append((r, pad, im.shape[:2]))
+        pred = self.forward(batch)
+        xyxy = []
+        for p, (r, (left, top), (h, w)) in zip(pred, metas):
+            det = non_max_suppression(p, self.conf, self.iou)
+            # Đưa toạ độ về ảnh gốc
+            det[:, [0, 2]] = np.clip((det[:, [0, 2]] - left) / r, 0, w)
+            det[:, [1, 3]] = np.clip((det[:, [1, 3]] - top) / r, 0, h)
+            xyxy.append(det)
+        return Detections(xyxy, self.names)
+
+class OnnxModel(ExportedModel):
+    def __init__(self, model_path, conf=0.25, iou=0.45, size=640, threads=0):
+        super().__init__(model_path, conf, iou, size)
+        import onnxruntime as ort
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = threads
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        # Trục H, W động được ghi là tên (str) hoặc None thay vì số
+        self.dynamic = not all(isinstance(d, int) for d in model_input.shape[2:])
+
+    def forward(self, batch):
+        return self.session.run(None, {self.input_name: batch})[0]
+
+class TorchScriptModel(ExportedModel):
+    def __init__(self, model_path, conf=0.25, iou=0.45, size=640):
+        super().__init__(model_path, conf, iou, size)
+        import torch
+        self.torch = torch
+        self.module = torch.jit.load(model_path, map_location="cpu").eval()
+
+    def forward(self, batch):
+        with self.torch.inference_mode():
+            return self.module(self.torch.from_numpy(batch)).numpy()
@@ -0,0 +1,130 @@
+import os
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import Future
+
+from function.helper import to_numpy
+from app_utils.metrics import metrics
+import app_utils.models as models
+
+# Số ảnh tối đa mỗi lần chạy model và thời gian chờ tối đa (ms) để gom đủ batch
+BATCH_SIZE = int(os.environ.get("LPR_BATCH_SIZE", "8"))
+BATCH_WAIT_MS = float(os.environ.get("LPR_BATCH_WAIT_MS", "20"))
+
+BatchResults = namedtuple("BatchResults", ["xyxy", "names"])
+
+class MicroBatcher:
+    """Gom ảnh từ nhiều luồng (nhiều camera, video, ảnh) thành batch động cho một model.
+
+    submit() trả về Future với kết quả (N, 6) của ảnh đó. Luồng nền chạy model khi đã gom đủ
+    `max_batch` ảnh cùng kích thước đầu vào hoặc khi ảnh chờ lâu nhất đã đợi `max_wait_ms`.
+    Có thể gọi trực tiếp như model: batcher(ims, size=640) trả về đối tượng có .xyxy và .names.
+    """
+
+    def __init__(self, load_model, max_batch=BATCH_SIZE, max_wait_ms=BATCH_WAIT_MS, name="model"):
+        self.load_model = load_model
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self.name = name
+        self.cond = threading.Condition()
+        self.pending = {}  # size -> [(ảnh, future, thời điểm gửi)]
+        self.batches = 0
+        self.items = 0
+        self.running = True
+        self.thread = threading.Thread(target=self._loop, daemon=True)
+        self.thread.start()
+
+    @property
+    def occupancy(self):
+        """Tỉ lệ lấp đầy batch trung bình (1.0 là mọi batch đều đủ max_batch ảnh)."""
+        return self.items / (self.batches * self.max_batch) if self.batches else 0.0
+
+    def submit(self, image, size=None):
+        future = Future()
+        with self.cond:
+            if not self.running:
+                raise RuntimeError(f"{self.name} batcher is closed")
+            self.pending.setdefault(size, []).append((image, future, time.monotonic()))
+            self.cond.notify()
+        return future
+
+    def __call__(self, ims, size=None):
+        single = not isinstance(ims, (list, tuple))
+        futures = [self.submit(im, size) for im in ([ims] if single else ims)]
+        xyxy = [future.result() for future in futures]
+        return BatchResults(xyxy, self.load_model().names)
+
+    def _next_batch(self):
+        # Nhóm có ảnh chờ lâu nhất được chạy trước; trả về None khi đã đóng và hết ảnh
+        with self.cond:
+            while True:
+                if not self.pending:
+                    if not self.running:
+                        return None
+                    self.cond.wait()
+                    continue
+                full = [kv for kv in self.pending.items() if len(kv[1]) >= self.max_batch]
+                size, items = min(full or self.pending.items(), key=lambda kv: kv[1][0][2])
+                deadline = items[0][2] + self.max_wait
+                now = time.monotonic()
+                if full or now >= deadline or not self.running:
+                    batch, rest = items[:self.max_batch], items[self.max_batch:]
+                    if rest:
+                        self.pending[size] = rest
+                    else:
+                        del self.pending[size]
+                    return size, batch
+                self.cond.wait(deadline - now)
+
+    def _loop(self):
+        while True:
+            job = self._next_batch()
+            if job is None:
+                return
+            size, batch = job
+            images = [image for image, _, _ in batch]
+            try:
+                with metrics.stage(f"{self.name}_batch"):
+                    model = self.load_model()
+                    results = model(images) if size is None else model(images, size=size)
+                dets = [to_numpy(det) for det in results.xyxy]
+            except Exception as e:
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+            for (_, future, _), det in zip(batch, dets):
+                future.set_result(det)
+            self.batches += 1
+            self.items += len(batch)
+            metrics.inc(f"{self.name}_batches_total")
+            metrics.inc(f"{self.name}_batch_items_total", len(batch))
+            metrics.set_gauge(f"{self.name}_batch_occupancy", round(self.occupancy, 3))
+
+    def close(self):
+        """Chạy nốt các ảnh đang chờ rồi dừng luồng nền."""
+        with self.cond:
+            self.running = False
+            self.cond.notify()
+        self.thread.join(timeout=10)
+
+_batchers = {}
+_batchers_lock = threading.Lock()
+
+def batched_model(batched, name, backend=None):
+    """Model `name` cần dùng: model trực tiếp (batched=False), MicroBatcher dùng chung (True)
+    hoặc MicroBatcher riêng của người gọi (dict {"detector": ..., "ocr": ...})."""
+    if isinstance(batched, dict):
+        return batched[name]
+    if batched:
+        return get_batcher(name, backend)
+    return models.get_model(name, backend)
+
+def get_batcher(name, backend=None):
+    """MicroBatcher dùng chung cho model `name` ("detector" hoặc "ocr") trong process."""
+    key = (name, backend or models.BACKEND)
+    with _batchers_lock:
+        batcher = _batchers.get(key)
+        if batcher is None:
+            batcher = _batchers[key] = MicroBatcher(lambda: models.get_model(*key), name=name)
+        return batcher
@@ -0,0 +1,60 @@
+import os
+import queue
+import threading
+from collections import defaultdict, deque
+
+import cv2
+
+class DebugCropSink:
+    """Ghi ảnh crop biển số để debug trên luồng nền, chỉ khi được bật.
+
+    Mỗi track có một thư mục riêng và chỉ giữ `max_per_track` ảnh mới nhất. Khi tắt,
+    submit() trả về ngay và không có gì được ghi ra đĩa.
+    """
+
+    def __init__(self, directory="debug_crops", enabled=False, max_per_track=50, max_queue=64):
+        self.directory = directory
+        self.enabled = enabled
+        self.max_per_track = max_per_track
+        self.queue = queue.Queue(max_queue)
+        self.files = defaultdict(deque)
+        self.counters = defaultdict(int)
+        self.dropped = 0
+        self.thread = None
+        self.lock = threading.Lock()
+
+    def submit(self, crop_img, track_id=None):
+        if not self.enabled or crop_img.size == 0:
+            return
+        if self.thread is None:
+            with self.lock:
+                if self.thread is None:
+                    self.thread = threading.Thread(target=self._loop, daemon=True)
+                    self.thread.start()
+        try:
+            # Không chặn luồng nhận diện: bỏ ảnh khi hàng đợi đầy
+            self.queue.put_nowait((crop_img, track_id))
+        except queue.Full:
+            self.dropped += 1
+
+    def _loop(self):
+        while True:
+            crop_img, track_id = self.queue.get()
+            name = f"track_{track_id}" if track_id is not None else "untracked"
+            track_dir = os.path.join(self.directory, name)
+            os.makedirs(track_dir, exist_ok=True)
+            self.counters[name] += 1
+            path = os.path.join(track_dir, f"{self.counters[name]:06d}.jpg")
+            cv2.imwrite(path, crop_img)
+            files = self.files[name]
+            files.append(path)
+            while len(files) > self.max_per_track:
+                try:
+                    os.remove(files.popleft())
+                except OSError:
+                    pass
+
+debug_crops = DebugCropSink(
+    os.environ.get("LPR_DEBUG_CROPS_DIR", "debug_crops"),
+    enabled=os.environ.get("LPR_DEBUG_CROPS") == "1",
+)
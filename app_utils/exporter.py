@@ -0,0 +1,146 @@
+import csv
+import datetime
+import os
+import threading
+
+from app_utils.video_meta import format_duration, get_cache
+
+FIELDS = ["filename", "plate", "camera", "source", "time", "confidence"]
+
+def _format_row(row):
+    return {
+        "filename": row["filename"],
+        "plate": row["plate"],
+        "camera": row["camera"],
+        "source": row["source"],
+        "time": datetime.datetime.fromtimestamp(row["ts"]).strftime("%Y-%m-%d %H:%M:%S"),
+        "confidence": row["confidence"],
+    }
+
+def _chunks(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+class _CsvSink:
+    def __init__(self, path):
+        self.f = open(path, "w", encoding="utf-8-sig", newline="")
+        self.writer = csv.DictWriter(self.f, fieldnames=FIELDS)
+        self.writer.writeheader()
+
+    def write(self, rows):
+        self.writer.writerows(rows)
+
+    def close(self):
+        self.f.close()
+
+class _ParquetSink:
+    def __init__(self, path):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        self.pa = pa
+        self.schema = pa.schema([("filename", pa.string()), ("plate", pa.string()), ("camera", pa.string()),
+                                 ("source", pa.string()), ("time", pa.string()), ("confidence", pa.float64())])
+        self.writer = pq.ParquetWriter(path, self.schema)
+
+    def write(self, rows):
+        self.writer.write_table(self.pa.Table.from_pylist(rows, schema=self.schema))
+
+    def close(self):
+        self.writer.close()
+
+class _TextSink:
+    """Định dạng báo cáo văn bản cũ, phần video được viết khi đóng file."""
+
+    def __init__(self, path, video_dir=None, since=None, until=None):
+        self.f = open(path, "w", encoding="utf-8")
+        self.video_dir = video_dir
+        self.since = since
+        self.until = until
+        self.f.write("BÁO CÁO NHẬN DIỆN BIỂN SỐ XE\n")
+        self.f.write("=" * 40 + "\n\n")
+        self.f.write(f"Ngày xuất báo cáo: {datetime.datetime.now().strftime('%d/%m/%Y %H:%M:%S')}\n\n")
+        self.f.write("DANH SÁCH BIỂN SỐ NHẬN DIỆN TỪ HÌNH ẢNH:\n")
+        self.f.write("-" * 40 + "\n")
+
+    def write(self, rows):
+        for row in rows:
+            self.f.write(f"Tên file: {row['filename']}\n")
+            self.f.write(f"Biển số: {row['plate']}\n")
+            self.f.write(f"Thời gian: {row['time']}\n")
+            self.f.write("-" * 40 + "\n")
+
+    def close(self):
+        self.f.write("\nDANH SÁCH BIỂN SỐ NHẬN DIỆN TỪ VIDEO:\n")
+        self.f.write("-" * 40 + "\n")
+        if self.video_dir and os.path.isdir(self.video_dir):
+            cache = get_cache(self.video_dir)
+            for file in sorted(os.listdir(self.video_dir), reverse=True):
+                if not file.endswith('.mp4'):
+                    continue
+                meta = cache.get(file) or {}
+                start = meta.get("start_time", os.path.getmtime(os.path.join(self.video_dir, file)))
+                if (self.since is not None and start < self.since) or (self.until is not None and start >= self.until):
+                    continue
+                self.f.write(f"Video: {file}\n")
+                self.f.write(f"Ngày: {datetime.datetime.fromtimestamp(start).strftime('%d/%m/%Y')}\n")
+                self.f.write(f"Thời lượng: {format_duration(meta.get('duration', 0.0))}\n")
+                for event in meta.get("events", []):
+                    self.f.write(f"  {format_duration(event['time'])} - {event['plate']}\n")
+                self.f.write("-" * 40 + "\n")
+            cache.save()
+        self.f.close()
+
+def export_detections(store, path, fmt=None, since=None, until=None, camera=None, plate=None,
+                      video_dir=None, chunk_size=10000, progress=None, cancel=None):
+    """Xuất lịch sử nhận diện theo từng khối (bộ nhớ không phụ thuộc số dòng).
+
+    fmt: "csv", "parquet" hoặc "txt" (mặc định theo đuôi file). progress(done, total) được gọi
+    sau mỗi khối; cancel là threading.Event để dừng giữa chừng. Trả về số dòng đã ghi.
+    """
+    fmt = fmt or os.path.splitext(path)[1].lstrip(".").lower() or "txt"
+    if fmt == "csv":
+        sink = _CsvSink(path)
+    elif fmt == "parquet":
+        sink = _ParquetSink(path)
+    else:
+        sink = _TextSink(path, video_dir, since, until)
+    total = store.count(plate, since, until, camera)
+    done = 0
+    try:
+        rows = store.iter_rows(plate, since, until, camera, chunk_size)
+        for chunk in _chunks(rows, chunk_size):
+            if cancel is not None and cancel.is_set():
+                break
+            sink.write([_format_row(row) for row in chunk])
+            done += len(chunk)
+            if progress is not None:
+                progress(done, total)
+    finally:
+        sink.close()
+    return done
+
+class ExportJob(threading.Thread):
+    """Chạy export_detections trên luồng nền; on_done(số dòng, lỗi hoặc None)."""
+
+    def __init__(self, store, path, on_done=None, **options):
+        super().__init__(daemon=True)
+        self.store = store
+        self.path = path
+        self.options = options
+        self.on_done = on_done
+        self.cancel = threading.Event()
+
+    def run(self):
+        try:
+            count = export_detections(self.store, self.path, cancel=self.cancel, **self.options)
+            error = None
+        except Exception as e:
+            count, error = 0, e
+        if self.on_done is not None:
+            self.on_done(count, error)
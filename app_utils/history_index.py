@@ -0,0 +1,81 @@
+import bisect
+import os
+import threading
+
+def sort_key(name):
+    """Khoá sắp xếp theo thời gian trong tên file <...>_<YYYYMMDD>_<HHMMSS>.<ext>, mới nhất ở cuối."""
+    parts = os.path.splitext(name)[0].rsplit('_', 2)
+    if len(parts) >= 3 and parts[-2].isdigit() and parts[-1].isdigit():
+        return (parts[-2] + parts[-1], name)
+    return ("", name)
+
+class HistoryIndex:
+    """Danh sách file lịch sử trong bộ nhớ (sắp theo thời gian), đồng bộ dần với thư mục.
+
+    refresh() chỉ quét lại thư mục khi mtime của thư mục thay đổi; page() trả về
+    một trang tên file, mới nhất trước.
+    """
+
+    def __init__(self, directory, ext):
+        self.directory = directory
+        self.ext = ext
+        self.lock = threading.Lock()
+        self.entries = []  # (sort_key, name) tăng dần
+        self.names = set()
+        self.dir_mtime = None
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, name):
+        return name in self.names
+
+    def refresh(self):
+        """Quét thư mục nếu có thay đổi, trả về (tên file mới, tên file đã bị xoá)."""
+        try:
+            mtime = os.stat(self.directory).st_mtime
+        except OSError:
+            return [], []
+        if mtime == self.dir_mtime:
+            return [], []
+        current = {entry.name for entry in os.scandir(self.directory) if entry.name.endswith(self.ext)}
+        with self.lock:
+            self.dir_mtime = mtime
+            added = sorted(current - self.names, key=sort_key)
+            removed = self.names - current
+            if removed:
+                self.entries = [e for e in self.entries if e[1] not in removed]
+                self.names -= removed
+            for name in added:
+                self._insert(name)
+        return added, sorted(removed)
+
+    def _insert(self, name):
+        bisect.insort(self.entries, (sort_key(name), name))
+        self.names.add(name)
+
+    def add(self, name):
+        """Thêm một file vừa được ghi (không cần quét lại thư mục)."""
+        with self.lock:
+            if name not in self.names:
+                self._insert(name)
+
+    def position(self, name):
+        """Vị trí của file tính từ mới nhất (0 là mới nhất)."""
+        with self.lock:
+            i = bisect.bisect_left(self.entries, (sort_key(name), name))
+            return len(self.entries) - 1 - i
+
+    def page(self, offset, limit):
+        """Tên file từ vị trí offset (tính từ mới nhất), tối đa limit phần tử."""
+        with self.lock:
+            end = len(self.entries) - offset
+            start = max(end - limit, 0)
+            if end <= 0:
+                return []
+            return [name for _, name in reversed(self.entries[start:end])]
+
+    def all(self):
+        """Toàn bộ tên file, mới nhất trước."""
+        with self.lock:
+            return [name for _, name in reversed(self.entries)]
@@ -0,0 +1,143 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+class _NullStage:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL_STAGE = _NullStage()
+
+class _Stage:
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.observe(self.name, (time.perf_counter() - self.start) * 1000)
+        return False
+
+class Metrics:
+    """Đo thời gian từng bước, bộ đếm và gauge của pipeline nhận diện.
+
+    Khi chưa bật (enabled=False) mọi lời gọi trả về ngay, không tốn chi phí đáng kể.
+    """
+
+    def __init__(self, window=500):
+        self.enabled = False
+        self.window = window
+        self.lock = threading.Lock()
+        self.timings = {}
+        self.counters = {}
+        self.gauges = {}
+
+    def stage(self, name):
+        if not self.enabled:
+            return _NULL_STAGE
+        return _Stage(self, name)
+
+    def observe(self, name, ms):
+        with self.lock:
+            entry = self.timings.get(name)
+            if entry is None:
+                entry = self.timings[name] = {"count": 0, "sum_ms": 0.0, "recent": deque(maxlen=self.window)}
+            entry["count"] += 1
+            entry["sum_ms"] += ms
+            entry["recent"].append(ms)
+
+    def inc(self, name, value=1):
+        if not self.enabled:
+            return
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def set_gauge(self, name, value):
+        if not self.enabled:
+            return
+        self.gauges[name] = value
+
+    def snapshot(self):
+        with self.lock:
+            stages = {}
+            for name, entry in self.timings.items():
+                recent = sorted(entry["recent"])
+                stages[name] = {
+                    "count": entry["count"],
+                    "sum_ms": round(entry["sum_ms"], 3),
+                    "p50_ms": round(recent[len(recent) // 2], 3) if recent else 0.0,
+                    "p95_ms": round(recent[int(len(recent) * 0.95)], 3) if recent else 0.0,
+                }
+            return {"time": time.time(), "stages": stages, "counters": dict(self.counters), "gauges": dict(self.gauges)}
+
+    def prometheus_text(self):
+        snap = self.snapshot()
+        lines = []
+        for name, stats in snap["stages"].items():
+            lines.append(f'lpr_stage_ms_sum{{stage="{name}"}} {stats["sum_ms"]}')
+            lines.append(f'lpr_stage_ms_count{{stage="{name}"}} {stats["count"]}')
+            lines.append(f'lpr_stage_ms{{stage="{name}",quantile="0.5"}} {stats["p50_ms"]}')
+            lines.append(f'lpr_stage_ms{{stage="{name}",quantile="0.95"}} {stats["p95_ms"]}')
+        for name, value in snap["counters"].items():
+            lines.append(f"lpr_{name} {value}")
+        for name, value in snap["gauges"].items():
+            lines.append(f"lpr_{name} {value}")
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port=9108, host="127.0.0.1"):
+        """Mở endpoint dạng Prometheus tại http://host:port/metrics trên luồng nền."""
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.startswith("/metrics.json"):
+                    body, ctype = json.dumps(metrics.snapshot()).encode(), "application/json"
+                else:
+                    body, ctype = metrics.prometheus_text().encode(), "text/plain; version=0.0.4"
+                self.send_response(200)
+                self.send_header("Content-Type", ctype)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+    def log_json(self, path, interval=10.0, max_bytes=10 * 1024 * 1024):
+        """Ghi snapshot ra file JSON Lines mỗi `interval` giây, xoay vòng file khi quá max_bytes."""
+        def loop():
+            while True:
+                time.sleep(interval)
+                if os.path.exists(path) and os.path.getsize(path) > max_bytes:
+                    os.replace(path, path + ".1")
+                with open(path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(self.snapshot()) + "\n")
+
+        threading.Thread(target=loop, daemon=True).start()
+
+metrics = Metrics()
+
+def configure_from_env():
+    """Bật metrics bằng LPR_METRICS=1, endpoint qua LPR_METRICS_PORT, log JSON qua LPR_METRICS_LOG."""
+    if os.environ.get("LPR_METRICS") != "1":
+        return
+    metrics.enabled = True
+    if os.environ.get("LPR_METRICS_PORT"):
+        metrics.serve(int(os.environ["LPR_METRICS_PORT"]))
+    if os.environ.get("LPR_METRICS_LOG"):
+        metrics.log_json(os.environ["LPR_METRICS_LOG"])
+
+configure_from_env()
@@ -0,0 +1,77 @@
+import os
+import threading
+import numpy as np
+
+# Thư mục gốc của project (chứa yolov5/ và model/)
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+YOLOV5_DIR = os.environ.get("LPR_YOLOV5_DIR", os.path.join(BASE_DIR, "yolov5"))
+MODEL_PATHS = {
+    "detector": os.environ.get("LPR_DETECTOR_MODEL", os.path.join(BASE_DIR, "model", "LP_detection_nano.pt")),
+    "ocr": os.environ.get("LPR_OCR_MODEL", os.path.join(BASE_DIR, "model", "LP_ocr_nano.pt")),
+}
+# Ngưỡng confidence của model OCR
+OCR_CONF = 0.60
+# Backend suy luận: "torch" (torch.hub yolov5), "onnx" hoặc "torchscript" (file tạo bởi export_models.py),
+# "onnx_int8" (model INT8 tạo bởi quantize_models.py)
+BACKEND = os.environ.get("LPR_BACKEND", "torch")
+EXPORT_EXTS = {"onnx": ".onnx", "torchscript": ".torchscript", "onnx_int8": ".int8.onnx"}
+# Số luồng của mỗi phiên onnxruntime, 0 để onnxruntime tự chọn (dùng mọi core)
+ONNX_THREADS = int(os.environ.get("LPR_ONNX_THREADS", "0"))
+
+_models = {}
+_lock = threading.Lock()
+
+def exported_path(name, backend):
+    return os.path.splitext(MODEL_PATHS[name])[0] + EXPORT_EXTS[backend]
+
+def set_backend(backend):
+    """Chọn backend mặc định cho các lần gọi sau; model đã load (theo từng backend) vẫn được giữ lại."""
+    global BACKEND
+    if backend not in ("torch",) + tuple(EXPORT_EXTS):
+        raise ValueError(f"unknown backend: {backend}")
+    BACKEND = backend
+
+def set_threads(threads):
+    """Giới hạn số luồng suy luận của các model load sau đó (ví dụ mỗi worker của lp_batch một luồng)."""
+    global ONNX_THREADS
+    ONNX_THREADS = threads
+    if BACKEND in ("torch", "torchscript"):
+        import torch
+        torch.set_num_threads(threads)
+
+def _load(name, backend):
+    conf = OCR_CONF if name == "ocr" else 0.25
+    if backend in ("onnx", "onnx_int8"):
+        from app_utils.backends import OnnxModel
+        return OnnxModel(exported_path(name, backend), conf=conf, threads=ONNX_THREADS)
+    if backend == "torchscript":
+        from app_utils.backends import TorchScriptModel
+        return TorchScriptModel(exported_path(name, backend), conf=conf)
+    import torch
+    model = torch.hub.load(YOLOV5_DIR, 'custom', path=MODEL_PATHS[name], source='local')
+    model.conf = conf
+    return model
+
+def get_model(name, backend=None):
+    """Trả về model `name` ("detector" hoặc "ocr"), chỉ load một lần cho mỗi process và backend."""
+    key = (name, backend or BACKEND)
+    model = _models.get(key)
+    if model is None:
+        with _lock:
+            model = _models.get(key)
+            if model is None:
+                model = _load(*key)
+                _models[key] = model
+    return model
+
+def get_detector(backend=None):
+    return get_model("detector", backend)
+
+def get_ocr(backend=None):
+    return get_model("ocr", backend)
+
+def warmup():
+    """Load cả hai model và chạy thử một ảnh trống để lần nhận diện đầu tiên không bị chậm."""
+    blank = np.zeros((64, 64, 3), dtype=np.uint8)
+    get_detector()(blank, size=640)
+    get_ocr()(blank)
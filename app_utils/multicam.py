@@ -0,0 +1,132 @@
+import threading
+import time
+
+import cv2
+
+from function.motion import MotionGate
+from function.roi import DetectionRegion, load_rois
+from function.tracker import PlateTracker
+from app_utils.metrics import metrics
+from app_utils.pipeline import CaptureThread
+from app_utils.batcher import MicroBatcher, get_batcher
+import app_utils.models as models
+from app_utils.process import ROI_FILE, draw_tracks, process_tracked_frame
+
+class CameraStream:
+    """Trạng thái của một camera: luồng capture, tracker, ROI, motion gate và giới hạn FPS."""
+
+    def __init__(self, source, max_fps=5.0, motion_gate=True, region=None):
+        self.source = str(source)
+        self.cap = cv2.VideoCapture(source)
+        self.capture = CaptureThread(self.cap)
+        self.tracker = PlateTracker()
+        self.gate = MotionGate() if motion_gate else None
+        self.region = region
+        self.interval = 1.0 / max_fps if max_fps else 0.0
+        self.next_due = 0.0
+        self.frames_processed = 0
+
+    @property
+    def ended(self):
+        return self.capture.ended
+
+    def take(self, now, timeout=0.0):
+        """Frame mới nhất của camera; lần lấy tiếp theo chờ theo giới hạn FPS."""
+        frame, _ = self.capture.latest(timeout)
+        if frame is None:
+            return None
+        self.next_due = now + self.interval
+        return frame
+
+class MultiCameraRunner:
+    """Chạy nhiều camera trong một process với một bộ model dùng chung.
+
+    Mỗi camera có luồng capture và luồng xử lý riêng (giới hạn FPS theo camera); detection
+    và OCR của mọi camera đi qua MicroBatcher dùng chung, nên frame của các camera được
+    gộp thành batch. Mỗi camera chỉ có tối đa một frame đang chờ model và batch lấy ảnh
+    chờ lâu nhất trước, nên không camera nào bị bỏ đói. on_event(source, plate, frame, bbox,
+    confidence) được gọi cho mỗi biển số mới, on_frame(source, frame) cho mỗi frame đã xử lý.
+    """
+
+    def __init__(self, sources, max_fps=5.0, batch_size=None, motion_gate=True, rois=None,
+                 on_event=None, on_frame=None, backend=None, max_wait_ms=None):
+        rois = load_rois(ROI_FILE) if rois is None else rois
+        self.streams = []
+        for source in sources:
+            # max_fps có thể là một số chung hoặc dict {source: fps}
+            fps = max_fps.get(str(source), 5.0) if isinstance(max_fps, dict) else max_fps
+            region = DetectionRegion(rois.get(str(source)))
+            self.streams.append(CameraStream(source, fps, motion_gate, region))
+        if batch_size is None and max_wait_ms is None:
+            # Batcher dùng chung của process (LPR_BATCH_SIZE, LPR_BATCH_WAIT_MS)
+            self.batched = True
+            self.own_batchers = False
+            self.batchers = [get_batcher("detector", backend), get_batcher("ocr", backend)]
+        else:
+            # Tham số riêng: batcher riêng để không đổi cấu hình của các nguồn khác
+            self.batched = {}
+            for name in ("detector", "ocr"):
+                options = {"name": name}
+                if batch_size is not None:
+                    options["max_batch"] = batch_size
+                if max_wait_ms is not None:
+                    options["max_wait_ms"] = max_wait_ms
+                self.batched[name] = MicroBatcher(lambda name=name: models.get_model(name, backend), **options)
+            self.own_batchers = True
+            self.batchers = list(self.batched.values())
+        self.on_event = on_event
+        self.on_frame = on_frame
+        self.backend = backend
+        self.running = False
+        self.workers = [threading.Thread(target=self._worker, args=(stream,), daemon=True) for stream in self.streams]
+
+    def start(self):
+        self.running = True
+        for stream in self.streams:
+            stream.capture.start()
+        for worker in self.workers:
+            worker.start()
+
+    def is_alive(self):
+        return any(worker.is_alive() for worker in self.workers)
+
+    def _worker(self, stream):
+        while self.running:
+            wait = stream.next_due - time.time()
+            if wait > 0:
+                time.sleep(wait)
+            frame = stream.take(time.time(), timeout=0.5)
+            if frame is None:
+                if stream.ended:
+                    return
+                continue
+            self.process(stream, frame)
+
+    def process(self, stream, frame):
+        metrics.inc("frames_total")
+        if stream.gate is not None and not stream.gate(frame):
+            metrics.inc("frames_skipped_motion_total")
+            if self.on_frame is not None:
+                self.on_frame(stream.source, draw_tracks(frame, stream.tracker.visible()))
+            return
+        frame, new_plates, captured_frame = process_tracked_frame(
+            frame, stream.tracker, region=stream.region, backend=self.backend, batched=self.batched)
+        stream.frames_processed += 1
+        for track in new_plates:
+            track.reported = track.plate
+            metrics.inc("plate_events_total")
+            if self.on_event is not None:
+                self.on_event(stream.source, track.plate, captured_frame, track.bbox, float(track.confidence))
+        if self.on_frame is not None:
+            self.on_frame(stream.source, frame)
+
+    def stop(self):
+        self.running = False
+        for worker in self.workers:
+            worker.join(timeout=5)
+        # Mỗi luồng capture tự release camera của nó sau khi dừng
+        for stream in self.streams:
+            stream.capture.stop()
+        if self.own_batchers:
+            for batcher in self.batchers:
+                batcher.close()
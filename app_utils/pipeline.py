@@ -0,0 +1,175 @@
+import queue
+import threading
+import time
+
+from app_utils.metrics import metrics
+
+STOP = object()
+
+class DropQueue:
+    """Hàng đợi có giới hạn với chính sách bỏ frame khi đầy: drop_oldest, drop_newest hoặc block."""
+
+    def __init__(self, maxsize, policy="drop_oldest"):
+        self.queue = queue.Queue(maxsize)
+        self.policy = policy
+        self.dropped = 0
+
+    def put(self, item):
+        if self.policy == "block":
+            self.queue.put(item)
+            return
+        while True:
+            try:
+                self.queue.put_nowait(item)
+                return
+            except queue.Full:
+                if self.policy == "drop_newest" and item is not STOP:
+                    self.dropped += 1
+                    return
+                try:
+                    self.queue.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+    def get(self, timeout=None):
+        return self.queue.get(timeout=timeout)
+
+    def qsize(self):
+        return self.queue.qsize()
+
+class CaptureThread(threading.Thread):
+    """Đọc camera liên tục và chỉ giữ frame mới nhất.
+
+    Luồng này tự release() VideoCapture khi kết thúc, vì release trong lúc một luồng khác
+    đang read() là không an toàn với OpenCV.
+    """
+
+    def __init__(self, cap):
+        super().__init__(daemon=True)
+        self.cap = cap
+        self.cond = threading.Condition()
+        self.frame = None
+        self.frame_time = None
+        self.dropped = 0
+        self.ended = False
+        self.running = True
+
+    def run(self):
+        try:
+            while self.running:
+                ret, frame = self.cap.read()
+                if not ret:
+                    break
+                with self.cond:
+                    # Frame cũ chưa được xử lý sẽ bị ghi đè
+                    if self.frame is not None:
+                        self.dropped += 1
+                    self.frame = frame
+                    self.frame_time = time.time()
+                    self.cond.notify_all()
+        finally:
+            self.cap.release()
+            with self.cond:
+                self.ended = True
+                self.cond.notify_all()
+
+    def latest(self, timeout=0.5):
+        """Lấy frame mới nhất (và thời điểm chụp), trả về (None, None) khi hết luồng hoặc quá thời gian chờ."""
+        with self.cond:
+            self.cond.wait_for(lambda: self.frame is not None or self.ended, timeout)
+            frame, frame_time = self.frame, self.frame_time
+            self.frame = None
+            return frame, frame_time
+
+    def stop(self, timeout=5):
+        """Dừng đọc và chờ luồng kết thúc (VideoCapture được release trong luồng)."""
+        self.running = False
+        if self.is_alive():
+            self.join(timeout)
+
+class RealtimePipeline:
+    """Pipeline nhiều luồng: capture -> nhận diện -> (hiển thị, ghi video).
+
+    process_fn(frame) trả về (frame đã xử lý, danh sách sự kiện). Frame hiển thị dùng
+    hàng đợi 1 phần tử bỏ frame cũ; sự kiện biển số không bao giờ bị bỏ. recorder (nếu có)
+    là luồng ghi video nhận frame qua put(frame, thời điểm chụp), xem app_utils.recorder.
+    """
+
+    def __init__(self, cap, process_fn, recorder=None):
+        self.capture = CaptureThread(cap)
+        self.process_fn = process_fn
+        self.render_queue = DropQueue(1, "drop_oldest")
+        self.events = queue.Queue()
+        self.recorder = recorder
+        self.inference = threading.Thread(target=self._infer_loop, daemon=True)
+        self.running = False
+        self.latency = 0.0
+        self.error = None
+
+    def start(self):
+        self.running = True
+        self.capture.start()
+        if self.recorder is not None:
+            self.recorder.start()
+        self.inference.start()
+
+    def _infer_loop(self):
+        try:
+            while self.running:
+                frame, frame_time = self.capture.latest()
+                if frame is None:
+                    if self.capture.ended:
+                        break
+                    continue
+                processed_frame, events = self.process_fn(frame)
+                self.latency = time.time() - frame_time
+                for event in events:
+                    self.events.put(event)
+                if self.recorder is not None:
+                    self.recorder.put(processed_frame, frame_time)
+                self.render_queue.put(processed_frame)
+                self.report_metrics()
+        except Exception as e:
+            # Lỗi model/backend được chuyển cho luồng hiển thị (xem next_frame)
+            self.error = e
+        finally:
+            self.render_queue.put(STOP)
+
+    def report_metrics(self):
+        if not metrics.enabled:
+            return
+        metrics.set_gauge("latency_ms", round(self.latency * 1000, 1))
+        metrics.set_gauge("capture_dropped_frames", self.capture.dropped)
+        metrics.set_gauge("render_dropped_frames", self.render_queue.dropped)
+        metrics.set_gauge("event_queue_depth", self.events.qsize())
+        if self.recorder is not None:
+            metrics.set_gauge("writer_queue_depth", self.recorder.frames.qsize())
+            metrics.set_gauge("writer_dropped_frames", self.recorder.frames.dropped)
+
+    def next_frame(self, timeout=0.05):
+        """Frame mới nhất để hiển thị, None nếu chưa có, STOP khi pipeline kết thúc.
+
+        Nếu luồng nhận diện dừng vì lỗi, lỗi đó được raise lại ở đây.
+        """
+        try:
+            frame = self.render_queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        if frame is STOP and self.error is not None:
+            raise self.error
+        return frame
+
+    def drain_events(self):
+        while True:
+            try:
+                yield self.events.get_nowait()
+            except queue.Empty:
+                return
+
+    def stop(self):
+        self.running = False
+        self.capture.stop()
+        self.inference.join(timeout=5)
+        if self.recorder is not None:
+            self.recorder.stop()
@@ -1,61 +1,192 @@
 import cv2
-import torch
 import numpy as np
 import time
 from PIL import Image
-from function.utils_rotate import deskew
-from function.helper import read_plate
+from function.utils_rotate import DeskewRetryPolicy, deskew_variants
+from function.tracker import PlateTracker
+from function.motion import MotionGate
+from function.roi import DetectionRegion, load_rois
+from app_utils.batcher import batched_model
+from app_utils.debug_crops import debug_crops
+from app_utils.metrics import metrics
+from app_utils.models import get_ocr
+from app_utils.pipeline import RealtimePipeline, STOP
+from app_utils.recorder import SegmentRecorder
+from app_utils.snapshots import SnapshotWriter
+from app_utils.video_meta import get_cache
+from function.helper import read_plate, read_plates, to_numpy
 import os
 
 # Ensure history and video directories exist
 HISTORY_DIR = "D:/Python/License-Plate-Recognition/history_image"
 VIDEO_DIR = "D:/Python/License-Plate-Recognition/history_video"
+# Vùng ROI theo từng camera: {"<cam_source>": [[[x, y], ...], ...]}
+ROI_FILE = "D:/Python/License-Plate-Recognition/roi.json"
 for directory in [HISTORY_DIR, VIDEO_DIR]:
     if not os.path.exists(directory):
         os.makedirs(directory)
 
-# Load models
-yolo_LP_detect = torch.hub.load('yolov5', 'custom', path='D:/Python/License-Plate-Recognition/model/LP_detection_nano.pt', force_reload=True, source='local')
-yolo_license_plate = torch.hub.load('yolov5', 'custom', path='D:/Python/License-Plate-Recognition/model/LP_ocr_nano.pt', force_reload=True, source='local')
-yolo_license_plate.conf = 0.60
+# Model được load lười ở lần dùng đầu tiên (xem app_utils.models)
+default_retry_policy = DeskewRetryPolicy()
 
-def process_frame(frame):
+def recognize_plates(crops, retry_policy=None, detail=False, backend=None, batched=False):
+    """Đọc biển số của nhiều ảnh crop, mỗi vòng gom các biến thể deskew vào một batch OCR.
+
+    Với detail=True mỗi phần tử là (biển số, [(ký tự, độ tin cậy), ...] theo từng dòng).
+    Với batched=True ảnh được gửi qua MicroBatcher dùng chung để gộp với các luồng khác
+    (hoặc qua các batcher riêng nếu batched là dict, xem app_utils.batcher.batched_model).
+    """
+    retry_policy = retry_policy or default_retry_policy
+    order = retry_policy.order()
+    lps = [("unknown", None) if detail else "unknown"] * len(crops)
+    pending = {i: deskew_variants(crop_img, order) for i, crop_img in enumerate(crops) if crop_img.size > 0}
+    metrics.inc("plates_total", len(pending))
+    while pending:
+        batch = []
+        owners = []
+        with metrics.stage("deskew"):
+            for i, variants in list(pending.items()):
+                item = next(variants, None)
+                if item is None:
+                    del pending[i]
+                    continue
+                owners.append((i, item[0]))
+                batch.append(item[1])
+        metrics.inc("deskew_attempts_total", len(batch))
+        with metrics.stage("ocr"):
+            readings = read_plates(batched_model(batched, "ocr", backend), batch, detail)
+        # Biển số nào đọc được thì dừng, các biển còn lại thử biến thể tiếp theo
+        for (i, variant), reading in zip(owners, readings):
+            lp = reading[0] if detail else reading
+            retry_policy.record(variant, lp != "unknown")
+            if lp != "unknown":
+                lps[i] = reading
+                del pending[i]
+    if metrics.enabled:
+        read = sum(1 for lp in lps if (lp[0] if detail else lp) != "unknown")
+        metrics.inc("plates_unknown_total", sum(1 for crop_img in crops if crop_img.size > 0) - read)
+    return lps
+
+def detect_plates(frame, region=None, backend=None, batched=False):
+    """Phát hiện vùng biển số, trả về danh sách [xmin, ymin, xmax, ymax, conf, cls].
+
+    Với region (DetectionRegion) chỉ vùng ROI được đưa vào model, ở kích thước đầu vào
+    chọn theo độ lớn biển số của các frame trước. backend chọn "torch", "onnx" hoặc
+    "torchscript" (mặc định theo app_utils.models.BACKEND).
+    """
+    return detect_plates_batch([frame], [region], backend, batched)[0]
+
+def detect_plates_batch(frames, regions=None, backend=None, batched=False):
+    """Như detect_plates cho nhiều frame (có thể từ nhiều camera), mỗi frame một region.
+
+    Các frame có cùng kích thước đầu vào được đưa qua model trong một lần gọi; với
+    batched=True chúng đi qua MicroBatcher dùng chung (xem app_utils.batcher).
+    """
+    regions = regions or [None] * len(frames)
+    results = [[] for _ in frames]
+    groups = {}
+    for i, (frame, region) in enumerate(zip(frames, regions)):
+        if region is None:
+            image, offset, size = frame, (0, 0), 640
+        else:
+            image, offset = region.crop(frame)
+            if image.size == 0:
+                continue
+            size = region.size_for(image)
+        groups.setdefault(size, []).append((i, image, offset))
+    for size, items in groups.items():
+        with metrics.stage("detection"):
+            model = batched_model(batched, "detector", backend)
+            plates = model([image for _, image, _ in items], size=size)
+        for (i, _, (ox, oy)), det in zip(items, plates.xyxy):
+            region = regions[i]
+            for plate in to_numpy(det).tolist():
+                plate[0] += ox
+                plate[1] += oy
+                plate[2] += ox
+                plate[3] += oy
+                if region is None or region.inside(plate):
+                    results[i].append(plate)
+    for region, list_plates in zip(regions, results):
+        if region is not None:
+            region.observe(list_plates)
+    return results
+
+def crop_plate(frame, plate, track_id=None):
+    """Cắt vùng biển số ra khỏi frame (ảnh crop chỉ được ghi ra đĩa khi bật debug_crops)."""
+    x = max(int(plate[0]), 0)  # xmin
+    y = max(int(plate[1]), 0)  # ymin
+    w = int(plate[2] - plate[0])  # xmax - xmin
+    h = int(plate[3] - plate[1])  # ymax - ymin
+    crop_img = frame[y:y+h, x:x+w].copy()
+    debug_crops.submit(crop_img, track_id)
+    return crop_img
+
+def process_frame(frame, retry_policy=None, backend=None):
     """Xử lý một frame (ảnh hoặc frame video) để nhận diện biển số."""
+    with metrics.stage("process_frame"):
+        return _process_frame(frame, retry_policy, backend)
+
+def _process_frame(frame, retry_policy, backend):
     list_read_plates = set()
-    plates = yolo_LP_detect(frame, size=640)
-    list_plates = plates.pandas().xyxy[0].values.tolist()
+    list_plates = detect_plates(frame, backend=backend)
     captured_frame = None
 
     if len(list_plates) == 0:
-        lp = read_plate(yolo_license_plate, frame)
+        lp = read_plate(get_ocr(backend), frame)
         if lp != "unknown":
             cv2.putText(frame, lp, (7, 70), cv2.FONT_HERSHEY_SIMPLEX, 0.9, (36, 255, 12), 2)
             list_read_plates.add(lp)
             captured_frame = frame.copy()
     else:
+        crops = [crop_plate(frame, plate) for plate in list_plates]
         for plate in list_plates:
-            flag = 0
-            x = int(plate[0])  # xmin
-            y = int(plate[1])  # ymin
-            w = int(plate[2] - plate[0])  # xmax - xmin
-            h = int(plate[3] - plate[1])  # ymax - ymin
-            crop_img = frame[y:y+h, x:x+w]
             cv2.rectangle(frame, (int(plate[0]), int(plate[1])), (int(plate[2]), int(plate[3])), color=(0, 0, 225), thickness=2)
-            cv2.imwrite("crop.jpg", crop_img)
-            lp = ""
-            for cc in range(0, 2):
-                for ct in range(0, 2):
-                    lp = read_plate(yolo_license_plate, deskew(crop_img, cc, ct))
-                    if lp != "unknown":
-                        list_read_plates.add(lp)
-                        cv2.putText(frame, lp, (int(plate[0]), int(plate[1]-10)), cv2.FONT_HERSHEY_SIMPLEX, 0.9, (36, 255, 12), 2)
-                        flag = 1
-                        captured_frame = frame.copy()
-                        break
-                if flag == 1:
-                    break
+        for plate, lp in zip(list_plates, recognize_plates(crops, retry_policy, backend=backend)):
+            if lp != "unknown":
+                list_read_plates.add(lp)
+                cv2.putText(frame, lp, (int(plate[0]), int(plate[1]-10)), cv2.FONT_HERSHEY_SIMPLEX, 0.9, (36, 255, 12), 2)
+        if list_read_plates:
+            captured_frame = frame.copy()
     return frame, list_read_plates, captured_frame
 
+def process_tracked_frame(frame, tracker, retry_policy=None, region=None, backend=None, batched=False):
+    """Xử lý frame có theo dõi biển số: chỉ chạy OCR cho track mới hoặc sau mỗi N frame.
+
+    Trả về frame đã vẽ, các track vừa có kết quả ổn định và ảnh chụp lại (nếu có).
+    """
+    tracks, to_read, crops = update_tracks(frame, tracker, detect_plates(frame, region, backend, batched))
+    for track, (lp, lines) in zip(to_read, recognize_plates(crops, retry_policy, True, backend, batched)):
+        track.add_reading(lp, lines)
+    return annotate_tracks(frame, tracks)
+
+def update_tracks(frame, tracker, plates):
+    """Cập nhật tracker với các biển số phát hiện được, trả về (tracks, track cần OCR, ảnh crop)."""
+    tracks = tracker.update(plates)
+    to_read = [t for t in tracks if tracker.needs_ocr(t)]
+    crops = [crop_plate(frame, t.bbox, t.id) for t in to_read]
+    return tracks, to_read, crops
+
+def draw_tracks(frame, tracks):
+    """Vẽ khung và biển số của các track lên frame."""
+    with metrics.stage("drawing"):
+        for track in tracks:
+            x1, y1, x2, y2 = (int(v) for v in track.bbox)
+            cv2.rectangle(frame, (x1, y1), (x2, y2), color=(0, 0, 225), thickness=2)
+            if track.plate is not None:
+                cv2.putText(frame, track.plate, (x1, y1-10), cv2.FONT_HERSHEY_SIMPLEX, 0.9, (36, 255, 12), 2)
+    return frame
+
+def annotate_tracks(frame, tracks):
+    """Vẽ các track lên frame, trả về (frame, track vừa ổn định, ảnh chụp lại hoặc None)."""
+    captured_frame = None
+    draw_tracks(frame, tracks)
+    # Mỗi track chỉ báo một lần, khi kết quả hợp nhất đã ổn định
+    new_plates = [t for t in tracks if t.stable and t.reported is None]
+    if new_plates:
+        captured_frame = frame.copy()
+    return frame, new_plates, captured_frame
+
 def process_image(image_path):
     """Xử lý ảnh tĩnh."""
     img = cv2.imread(image_path)
@@ -70,69 +201,159 @@ def process_video(video_path):
     if not cap.isOpened():
         return None, "Không thể mở video", None
     
+    all_plates = set()
     while True:
         ret, frame = cap.read()
         if not ret:
             break
         processed_frame, plates, _ = process_frame(frame)
+        all_plates.update(plates)
         cv2.imshow('Video', processed_frame)
         if cv2.waitKey(1) & 0xFF == ord('q'):
             break
     cap.release()
     cv2.destroyAllWindows()
-    return None, plates, None
+    return None, all_plates, None
+
+def analyze_video(video_path, stride=1, start_sec=0.0, end_sec=None, motion_gate=True, region=None, batched=False):
+    """Phân tích video không giao diện, chạy nhanh nhất có thể.
+
+    Chỉ xử lý 1 trên mỗi `stride` frame trong khoảng [start_sec, end_sec] và bỏ qua
+    frame tĩnh khi bật motion_gate. Trả về timeline gồm các dict
+    {time, frame, track, plate, confidence, bbox} cho toàn bộ video. Với batched=True
+    model được gọi qua MicroBatcher dùng chung với các nguồn khác trong process.
+    """
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        return None
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30
+    if start_sec > 0:
+        cap.set(cv2.CAP_PROP_POS_MSEC, start_sec * 1000)
+    frame_idx = int(cap.get(cv2.CAP_PROP_POS_FRAMES))
+    tracker = PlateTracker(ocr_interval=max(10 // stride, 1), max_missed=max(15 // stride, 1))
+    gate = MotionGate() if motion_gate else None
+    timeline = []
+    try:
+        while True:
+            # grab() bỏ qua frame mà không cần giải mã
+            if not cap.grab():
+                break
+            frame_time = frame_idx / fps
+            if end_sec is not None and frame_time > end_sec:
+                break
+            take = frame_idx % stride == 0
+            frame_idx += 1
+            if not take:
+                continue
+            ret, frame = cap.retrieve()
+            if not ret:
+                break
+            if gate is not None and not gate(frame, frame_time):
+                # Frame tĩnh: các track đang hiển thị vẫn được ghi vào timeline
+                tracks = tracker.visible()
+            else:
+                tracks, to_read, crops = update_tracks(frame, tracker, detect_plates(frame, region, batched=batched))
+                for track, (lp, lines) in zip(to_read, recognize_plates(crops, detail=True, batched=batched)):
+                    track.add_reading(lp, lines)
+            for track in tracks:
+                timeline.append({
+                    "time": round(frame_time, 3),
+                    "frame": frame_idx - 1,
+                    "track": track.id,
+                    "plate": track.plate,
+                    "confidence": round(track.confidence, 3),
+                    "bbox": [int(v) for v in track.bbox],
+                })
+    finally:
+        cap.release()
+    return timeline
+
+def process_realtime(cam_source="http://192.168.1.18:4747/video", motion_gate=True, region=None, snapshots=None,
+                     recorder=None, batched=False):
+    """Xử lý real-time từ webcam hoặc DroidCam.
+
+    Nếu không truyền region, vùng ROI của camera được đọc từ ROI_FILE (nếu có).
+
+    Ảnh biển số mới được ghi bởi `snapshots` (SnapshotWriter, mặc định ghi vào HISTORY_DIR);
+    đường dẫn file đã ghi được báo lại qua SnapshotWriter, không phải qua generator.
 
-def process_realtime(cam_source="http://192.168.1.18:4747/video"):
-    """Xử lý real-time từ webcam hoặc DroidCam."""
+    Với motion_gate, frame tĩnh không được đưa qua model phát hiện (vẫn kiểm tra định kỳ).
+
+    Capture, nhận diện và ghi video chạy trên các luồng riêng (xem app_utils.pipeline),
+    generator này chỉ hiển thị frame mới nhất và trả về (ảnh chụp, biển số mới, độ tin cậy
+    hợp nhất trong [0, 1]). Video được ghi bởi
+    `recorder` (mặc định SegmentRecorder vào VIDEO_DIR: chỉ các đoạn quanh sự kiện biển số).
+    Với batched=True model được gọi qua MicroBatcher dùng chung (xem app_utils.batcher).
+    """
     cap = cv2.VideoCapture(cam_source)
     if not cap.isOpened():
         return None, "Không thể mở luồng webcam", None
 
-    # Initialize video writer
-    timestamp = time.strftime("%Y%m%d_%H%M%S")
-    video_path = os.path.join(VIDEO_DIR, f"realtime_{timestamp}.mp4")
-    fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-    fps = 30
-    frame_width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-    frame_height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-    out = cv2.VideoWriter(video_path, fourcc, fps, (frame_width, frame_height))
+    if recorder is None:
+        # Lưu metadata ngay lúc ghi để danh sách video không phải mở lại file
+        recorder = SegmentRecorder(VIDEO_DIR, on_segment=lambda name, meta: get_cache(VIDEO_DIR).put(name, **meta))
+
+    tracker = PlateTracker()
+    gate = MotionGate() if motion_gate else None
+    if region is None:
+        region = DetectionRegion(load_rois(ROI_FILE).get(str(cam_source)))
+
+    def infer(frame):
+        metrics.inc("frames_total")
+        if gate is not None and not gate(frame):
+            metrics.inc("frames_skipped_motion_total")
+            # Chỉ bỏ qua detection/OCR, vẫn vẽ các track đang đứng yên (xe chờ ở barrier)
+            return draw_tracks(frame, tracker.visible()), []
+        processed_frame, new_plates, new_captured_frame = process_tracked_frame(frame, tracker, region=region,
+                                                                                batched=batched)
+        events = []
+        for track in new_plates:
+            track.reported = track.plate
+            recorder.trigger(track.plate)
+            events.append((new_captured_frame, track.plate, track.bbox, float(track.confidence)))
+        return processed_frame, events
 
-    prev_frame_time = 0
+    pipeline = RealtimePipeline(cap, infer, recorder)
+    prev_frame_time = time.time()
     cv2.namedWindow('Real-time', cv2.WINDOW_NORMAL)
     captured_frame = None
-    last_plate = None
     current_plate = None
-    
+    confidence = None
+    own_snapshots = snapshots is None
+    if own_snapshots:
+        snapshots = SnapshotWriter(HISTORY_DIR)
+
+    def save_events():
+        nonlocal captured_frame, current_plate, confidence
+        for captured_frame, current_plate, bbox, confidence in pipeline.drain_events():
+            snapshots.submit(captured_frame, current_plate, bbox, camera=str(cam_source), source="realtime",
+                             confidence=confidence)
+            metrics.inc("plate_events_total")
+            yield captured_frame, current_plate, confidence
+
+    pipeline.start()
     try:
         while True:
-            ret, frame = cap.read()
-            if not ret:
+            yield from save_events()
+            processed_frame = pipeline.next_frame()
+            if processed_frame is STOP:
                 break
-            processed_frame, plates, new_captured_frame = process_frame(frame)
-            out.write(processed_frame)  # Write frame to video
-
-            if new_captured_frame is not None and plates:
-                current_plate = next(iter(plates))
-                if current_plate != last_plate:
-                    captured_frame = new_captured_frame
-                    last_plate = current_plate
-                    timestamp = time.strftime("%Y%m%d_%H%M%S")
-                    save_path = os.path.join(HISTORY_DIR, f"plate_{timestamp}.jpg")
-                    cv2.imwrite(save_path, captured_frame)
-                    yield captured_frame, current_plate
-            
-            new_frame_time = time.time()
-            fps = 1 / (new_frame_time - prev_frame_time)
-            prev_frame_time = new_frame_time
-            cv2.putText(processed_frame, f"FPS: {int(fps)}", (7, 70), cv2.FONT_HERSHEY_SIMPLEX, 1, (100, 255, 0), 3)
-            
-            cv2.imshow('Real-time', processed_frame)
+            if processed_frame is not None:
+                # Vẽ FPS lên bản sao vì frame gốc còn được luồng ghi video sử dụng
+                processed_frame = processed_frame.copy()
+                new_frame_time = time.time()
+                fps = 1 / max(new_frame_time - prev_frame_time, 1e-6)
+                prev_frame_time = new_frame_time
+                cv2.putText(processed_frame, f"FPS: {int(fps)}", (7, 70), cv2.FONT_HERSHEY_SIMPLEX, 1, (100, 255, 0), 3)
+                cv2.imshow('Real-time', processed_frame)
             key = cv2.waitKey(1) & 0xFF
             if key == ord('q') or cv2.getWindowProperty('Real-time', cv2.WND_PROP_VISIBLE) < 1:
                 break
     finally:
-        out.release()  # Save the video
-        cap.release()
+        pipeline.stop()  # Save the video, the capture thread releases the camera
         cv2.destroyAllWindows()
-    
-    yield captured_frame, current_plate
\ No newline at end of file
+        if own_snapshots:
+            snapshots.flush()
+
+    yield from save_events()
+    yield captured_frame, current_plate, confidence
@@ -0,0 +1,179 @@
+import datetime
+import logging
+import os
+import queue
+import threading
+import time
+from collections import deque
+
+import cv2
+
+from app_utils.pipeline import DropQueue, STOP
+
+# "events": chỉ lưu các đoạn quanh sự kiện biển số, "continuous": ghi liên tục theo từng đoạn
+RECORD_MODE = os.environ.get("LPR_RECORD_MODE", "events")
+# Codec của VideoWriter, ví dụ "avc1" để dùng bộ mã hoá H.264 (phần cứng nếu OpenCV hỗ trợ)
+RECORD_FOURCC = os.environ.get("LPR_RECORD_FOURCC", "mp4v")
+# Chất lượng JPEG của các frame giữ trong bộ nhớ trước sự kiện
+BUFFER_QUALITY = int(os.environ.get("LPR_RECORD_BUFFER_QUALITY", "90"))
+
+log = logging.getLogger(__name__)
+
+class SegmentRecorder(threading.Thread):
+    """Ghi video trên luồng riêng theo từng đoạn có độ dài tối đa `segment_sec` giây.
+
+    Ở chế độ "events", các frame gần nhất (`pre_sec` giây) được giữ trong bộ nhớ; khi có
+    sự kiện (trigger) một đoạn mới được mở, bắt đầu từ các frame đã giữ (lưu dạng JPEG
+    để tiết kiệm bộ nhớ), và kéo dài tới
+    `post_sec` giây sau sự kiện cuối cùng. FPS của file là FPS đo được từ thời điểm chụp
+    frame. Mỗi đoạn ghi xong được báo qua on_segment(tên file, metadata).
+    """
+
+    def __init__(self, directory, prefix="realtime", mode=RECORD_MODE, pre_sec=5.0, post_sec=10.0,
+                 segment_sec=300.0, fourcc=RECORD_FOURCC, maxsize=64, max_buffer_frames=150,
+                 on_segment=None):
+        super().__init__(daemon=True)
+        self.directory = directory
+        self.prefix = prefix
+        self.mode = mode
+        self.pre_sec = pre_sec
+        self.post_sec = post_sec
+        self.segment_sec = segment_sec
+        self.fourcc = fourcc
+        self.on_segment = on_segment
+        self.frames = DropQueue(maxsize, "drop_oldest")
+        self.pending_events = queue.Queue()
+        self.buffer = deque(maxlen=max_buffer_frames)  # (ts, frame JPEG) trước sự kiện
+        self.buffer_events = []  # sự kiện đến trước frame đầu tiên
+        self.fps = None
+        self.last_ts = None
+        self.segment = None
+        self.segments_written = 0
+        self.frames_written = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def put(self, frame, ts=None):
+        self.frames.put((frame, time.time() if ts is None else ts))
+
+    def trigger(self, plate, ts=None):
+        """Đánh dấu một sự kiện biển số (không bao giờ bị bỏ như frame)."""
+        self.pending_events.put((time.time() if ts is None else ts, plate))
+
+    def _measure(self, ts):
+        # FPS trung bình trượt theo khoảng cách giữa các frame
+        if self.last_ts is not None and ts > self.last_ts:
+            rate = 1.0 / (ts - self.last_ts)
+            self.fps = rate if self.fps is None else 0.9 * self.fps + 0.1 * rate
+        self.last_ts = ts
+
+    def run(self):
+        while True:
+            item = self.frames.get()
+            for ts, plate in self._drain_events():
+                self._on_event(ts, plate)
+            if item is STOP:
+                break
+            frame, ts = item
+            self._measure(ts)
+            if self.segment is None and self.buffer_events:
+                self._open(frame, ts, ts + self.post_sec)
+            if self.segment is not None and (self.segment["end"] is not None and ts > self.segment["end"]
+                                             or ts - self.segment["start"] >= self.segment_sec):
+                end = self.segment["end"]
+                self._close()
+                # Sự kiện chưa kết thúc thì ghi tiếp sang đoạn mới
+                if end is None or ts <= end:
+                    self._open(frame, ts, end)
+            if self.segment is None and self.mode == "continuous":
+                self._open(frame, ts, None)
+            if self.segment is not None:
+                self._write(frame, ts)
+            else:
+                ok, buf = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, BUFFER_QUALITY])
+                if ok:
+                    self.buffer.append((ts, buf))
+                while self.buffer and ts - self.buffer[0][0] > self.pre_sec:
+                    self.buffer.popleft()
+        self._close()
+
+    def _drain_events(self):
+        while True:
+            try:
+                yield self.pending_events.get_nowait()
+            except queue.Empty:
+                return
+
+    def _on_event(self, ts, plate):
+        if self.segment is None:
+            if not self.buffer:
+                # Chưa có frame nào để mở file, sự kiện được ghi vào đoạn tiếp theo
+                self.buffer_events.append(plate)
+                return
+            for i, (buffered_ts, buf) in enumerate(self.buffer):
+                buffered_frame = cv2.imdecode(buf, cv2.IMREAD_COLOR)
+                if i == 0:
+                    self._open(buffered_frame, buffered_ts, ts + self.post_sec)
+                self._write(buffered_frame, buffered_ts)
+            self.buffer.clear()
+        elif self.segment["end"] is not None:
+            self.segment["end"] = max(self.segment["end"], ts + self.post_sec)
+        self.segment["events"].append({"time": round(max(ts - self.segment["start"], 0.0), 2), "plate": plate})
+
+    def _open(self, frame, ts, end):
+        fps = round(self.fps, 2) if self.fps else 15.0
+        t = datetime.datetime.fromtimestamp(ts)
+        name = f"{self.prefix}_{t.strftime('%Y%m%d')}_{t.strftime('%H%M%S')}{t.microsecond // 1000:03d}.mp4"
+        height, width = frame.shape[:2]
+        writer = self._open_writer(os.path.join(self.directory, name), fps, (width, height))
+        self.segment = {"name": name, "writer": writer, "fps": fps, "start": ts, "last": ts, "end": end,
+                        "frames": 0, "width": width, "height": height,
+                        "events": [{"time": 0.0, "plate": p} for p in self.buffer_events]}
+        self.buffer_events = []
+
+    def _open_writer(self, path, fps, size):
+        # Codec không được hỗ trợ thì thử lại với mp4v; vẫn lỗi thì bỏ đoạn này (không ghi file)
+        for fourcc in dict.fromkeys([self.fourcc, "mp4v"]):
+            writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*fourcc), fps, size)
+            if writer.isOpened():
+                if fourcc != self.fourcc:
+                    log.warning("codec %s is not available, recording with %s", self.fourcc, fourcc)
+                    self.fourcc = fourcc
+                return writer
+            writer.release()
+        log.error("cannot open video writer for %s", path)
+        return None
+
+    def _write(self, frame, ts):
+        if self.segment["writer"] is None:
+            return
+        self.segment["writer"].write(frame)
+        self.segment["frames"] += 1
+        self.segment["last"] = ts
+        self.frames_written += 1
+
+    def _close(self):
+        segment, self.segment = self.segment, None
+        if segment is None:
+            return
+        if segment["writer"] is None:
+            return
+        segment["writer"].release()
+        self.segments_written += 1
+        span = segment["last"] - segment["start"]
+        measured_fps = (segment["frames"] - 1) / span if span > 0 and segment["frames"] > 1 else segment["fps"]
+        if self.on_segment is None or segment["frames"] == 0:
+            return
+        try:
+            self.on_segment(segment["name"], {
+                "duration": segment["frames"] / segment["fps"], "fps": segment["fps"],
+                "measured_fps": round(measured_fps, 2), "frames": segment["frames"],
+                "width": segment["width"], "height": segment["height"],
+                "start_time": segment["start"], "events": segment["events"],
+            })
+        except Exception:
+            # Lỗi lưu metadata không được làm dừng luồng ghi video
+            log.exception("on_segment failed for %s", segment["name"])
+
+    def stop(self, timeout=10):
+        self.frames.put(STOP)
+        self.join(timeout=timeout)
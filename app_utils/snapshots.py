@@ -0,0 +1,157 @@
+import datetime
+import logging
+import os
+import queue
+import threading
+import time
+from collections import namedtuple
+
+import cv2
+
+from app_utils.metrics import metrics
+
+SNAPSHOT_QUALITY = int(os.environ.get("LPR_SNAPSHOT_QUALITY", "90"))
+# "frame": lưu cả frame, "crop": chỉ lưu vùng biển số
+SNAPSHOT_MODE = os.environ.get("LPR_SNAPSHOT_MODE", "frame")
+
+log = logging.getLogger(__name__)
+
+Snapshot = namedtuple("Snapshot", ["path", "filename", "plate", "camera", "source", "ts", "confidence"])
+
+class SnapshotWriter:
+    """Ghi ảnh chụp biển số ra thư mục lịch sử trên một luồng nền duy nhất.
+
+    submit() chỉ đưa frame vào hàng đợi có giới hạn (đầy thì bỏ ảnh mới); luồng nền mã hoá
+    JPEG, ghi theo lô và báo lại đường dẫn qua on_saved(snapshot) hoặc drain_saved().
+    Cùng một biển số trên cùng camera chỉ được lưu một lần trong `dedup_sec` giây.
+    Tên file <plate>_<YYYYMMDD>_<HHMMSSmmm>.jpg luôn tăng dần nên không bao giờ trùng.
+    """
+
+    def __init__(self, directory, quality=SNAPSHOT_QUALITY, mode=SNAPSHOT_MODE, max_queue=32,
+                 batch_size=8, dedup_sec=5.0, on_saved=None):
+        self.directory = directory
+        self.quality = quality
+        self.mode = mode
+        self.batch_size = batch_size
+        self.dedup_sec = dedup_sec
+        self.on_saved = on_saved
+        self.queue = queue.Queue(max_queue)
+        self.saved = queue.Queue()
+        self.last_seen = {}
+        self.unreported = {}  # tên file -> Snapshot đã có trên đĩa nhưng chưa qua drain_saved()
+        self.last_stamp = 0
+        self.lock = threading.Lock()
+        self.dropped = 0
+        self.deduped = 0
+        os.makedirs(directory, exist_ok=True)
+        self.thread = threading.Thread(target=self._loop, daemon=True)
+        self.thread.start()
+
+    def _next_stamp(self, ts):
+        # Mốc thời gian theo mili giây, tăng ít nhất 1 ms so với ảnh trước
+        with self.lock:
+            stamp = max(int(ts * 1000), self.last_stamp + 1)
+            self.last_stamp = stamp
+        return stamp
+
+    def filename(self, plate, ts):
+        stamp = self._next_stamp(ts)
+        t = datetime.datetime.fromtimestamp(stamp / 1000)
+        safe_plate = "".join(c if c.isalnum() or c in "-. " else "_" for c in plate)
+        return f"{safe_plate}_{t.strftime('%Y%m%d')}_{t.strftime('%H%M%S')}{stamp % 1000:03d}.jpg"
+
+    def submit(self, frame, plate, bbox=None, camera="", source="", ts=None, dedup=True, confidence=None):
+        """Đưa một ảnh vào hàng đợi ghi, trả về False nếu ảnh bị bỏ (trùng hoặc hàng đợi đầy)."""
+        if frame is None:
+            return False
+        ts = time.time() if ts is None else ts
+        if dedup:
+            key = (camera, plate)
+            with self.lock:
+                last = self.last_seen.get(key)
+                if last is not None and ts - last < self.dedup_sec:
+                    self.deduped += 1
+                    metrics.inc("snapshots_deduped_total")
+                    return False
+                self.last_seen[key] = ts
+        if self.mode == "crop" and bbox is not None:
+            x1, y1, x2, y2 = (int(v) for v in bbox[:4])
+            frame = frame[max(y1, 0):y2, max(x1, 0):x2]
+        try:
+            # Frame có thể còn được luồng khác vẽ lên nên phải sao chép
+            self.queue.put_nowait((frame.copy(), plate, camera, source, ts, confidence))
+        except queue.Full:
+            self.dropped += 1
+            metrics.inc("snapshots_dropped_total")
+            return False
+        return True
+
+    def _loop(self):
+        while True:
+            batch = [self.queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            for item in batch:
+                try:
+                    with metrics.stage("snapshot_write"):
+                        self._write(*item)
+                except Exception:
+                    # Lỗi ghi (đầy đĩa, quyền truy cập...) không được làm dừng luồng ghi
+                    metrics.inc("snapshot_errors_total")
+                    log.exception("cannot save snapshot for %s", item[1])
+                finally:
+                    self.queue.task_done()
+
+    def _write(self, frame, plate, camera, source, ts, confidence):
+        if frame.size == 0:
+            return
+        ok, buf = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+        if not ok:
+            raise ValueError("JPEG encoding failed")
+        filename = self.filename(plate, ts)
+        path = os.path.join(self.directory, filename)
+        # Ghi ra file tạm rồi đổi tên để danh sách lịch sử không thấy file ghi dở
+        tmp = path + ".part"
+        with open(tmp, "wb") as f:
+            f.write(buf.tobytes())
+        snapshot = Snapshot(path, filename, plate, camera, source, ts, confidence)
+        # Ghi nhận trước khi đổi tên để ai quét thư mục lấy được biển số qua unreported_snapshot()
+        with self.lock:
+            self.unreported[filename] = snapshot
+        try:
+            os.replace(tmp, path)
+        except OSError:
+            with self.lock:
+                self.unreported.pop(filename, None)
+            raise
+        metrics.inc("snapshots_written_total")
+        # Chỉ báo khi file đã có trên đĩa
+        self.saved.put(snapshot)
+        if self.on_saved is not None:
+            try:
+                self.on_saved(snapshot)
+            except Exception:
+                log.exception("on_saved failed for %s", filename)
+
+    def drain_saved(self):
+        """Các ảnh đã ghi xong kể từ lần gọi trước."""
+        while True:
+            try:
+                snapshot = self.saved.get_nowait()
+            except queue.Empty:
+                return
+            with self.lock:
+                self.unreported.pop(snapshot.filename, None)
+            yield snapshot
+
+    def unreported_snapshot(self, filename):
+        """Snapshot của file đã ghi xong nhưng chưa được trả về bởi drain_saved() (hoặc None)."""
+        with self.lock:
+            return self.unreported.get(filename)
+
+    def flush(self):
+        """Chờ ghi xong các ảnh đang trong hàng đợi."""
+        self.queue.join()
@@ -0,0 +1,200 @@
+import argparse
+import datetime
+import os
+import sqlite3
+import threading
+import time
+
+DB_PATH = "D:/hoc_may/License-Plate-Recognition/detections.db"
+LEGACY_HISTORY = "D:/hoc_may/License-Plate-Recognition/plate_history.txt"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS detections (
+    id INTEGER PRIMARY KEY,
+    filename TEXT NOT NULL,
+    plate TEXT NOT NULL,
+    camera TEXT NOT NULL DEFAULT '',
+    source TEXT NOT NULL DEFAULT '',
+    ts REAL NOT NULL,
+    confidence REAL
+);
+CREATE INDEX IF NOT EXISTS idx_detections_plate ON detections(plate);
+CREATE INDEX IF NOT EXISTS idx_detections_ts ON detections(ts);
+CREATE INDEX IF NOT EXISTS idx_detections_camera ON detections(camera, ts);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_detections_filename ON detections(filename);
+"""
+
+COLUMNS = ("id", "filename", "plate", "camera", "source", "ts", "confidence")
+
+def timestamp_from_filename(filename, default=None):
+    """Lấy thời điểm từ tên file dạng <plate>_<YYYYMMDD>_<HHMMSS>.jpg."""
+    parts = os.path.splitext(filename)[0].split('_')
+    if len(parts) >= 2:
+        try:
+            return datetime.datetime.strptime(parts[-2] + parts[-1][:6], "%Y%m%d%H%M%S").timestamp()
+        except ValueError:
+            pass
+    return time.time() if default is None else default
+
+class DetectionStore:
+    """Lưu lịch sử nhận diện trong SQLite (WAL, có index theo biển số, thời gian và camera)."""
+
+    def __init__(self, path=DB_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.conn.commit()
+
+    def add(self, filename, plate, camera="", source="", ts=None, confidence=None):
+        self.add_many([(filename, plate, camera, source, ts, confidence)])
+
+    def add_many(self, rows):
+        """rows: các tuple (filename, plate, camera, source, ts, confidence); ghi trong một transaction."""
+        now = time.time()
+        rows = [(f, p, c or "", s or "", now if ts is None else ts, conf) for f, p, c, s, ts, conf in rows]
+        with self.lock:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO detections (filename, plate, camera, source, ts, confidence) VALUES (?, ?, ?, ?, ?, ?)",
+                rows)
+            self.conn.commit()
+
+    def plates_for(self, filenames):
+        """{filename: plate} cho một trang tên file."""
+        result = {}
+        filenames = list(filenames)
+        with self.lock:
+            # SQLite giới hạn số tham số trong một câu lệnh
+            for start in range(0, len(filenames), 500):
+                chunk = filenames[start:start + 500]
+                sql = f"SELECT filename, plate FROM detections WHERE filename IN ({','.join('?' * len(chunk))})"
+                result.update(self.conn.execute(sql, chunk).fetchall())
+        return result
+
+    def _where(self, plate=None, since=None, until=None, camera=None):
+        clauses = []
+        params = []
+        if plate:
+            clauses.append("plate = ?")
+            params.append(plate)
+        if since is not None:
+            clauses.append("ts >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("ts < ?")
+            params.append(until)
+        if camera:
+            clauses.append("camera = ?")
+            params.append(camera)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def iter_rows(self, plate=None, since=None, until=None, camera=None, chunk_size=10000):
+        """Duyệt toàn bộ bản ghi theo id, mỗi lần đọc chunk_size dòng để giới hạn bộ nhớ."""
+        where, params = self._where(plate, since, until, camera)
+        where = (where + " AND" if where else " WHERE") + " id > ?"
+        last_id = 0
+        while True:
+            with self.lock:
+                rows = self.conn.execute(f"SELECT * FROM detections{where} ORDER BY id LIMIT ?",
+                                         params + [last_id, chunk_size]).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                yield dict(row)
+            last_id = rows[-1]["id"]
+
+    def count(self, plate=None, since=None, until=None, camera=None):
+        where, params = self._where(plate, since, until, camera)
+        with self.lock:
+            return self.conn.execute(f"SELECT COUNT(*) FROM detections{where}", params).fetchone()[0]
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+class BatchWriter:
+    """Gom các bản ghi và ghi theo lô trên luồng nền (mỗi `max_rows` bản ghi hoặc `interval` giây)."""
+
+    def __init__(self, store, max_rows=50, interval=1.0):
+        self.store = store
+        self.max_rows = max_rows
+        self.interval = interval
+        self.rows = []
+        self.cond = threading.Condition()
+        self.running = True
+        self.thread = threading.Thread(target=self._loop, daemon=True)
+        self.thread.start()
+
+    def add(self, filename, plate, camera="", source="", ts=None, confidence=None):
+        with self.cond:
+            self.rows.append((filename, plate, camera, source, time.time() if ts is None else ts, confidence))
+            if len(self.rows) >= self.max_rows:
+                self.cond.notify()
+
+    def flush(self):
+        """Ghi ngay các bản ghi đang chờ (dùng trước khi đọc lại lịch sử)."""
+        with self.cond:
+            rows, self.rows = self.rows, []
+        if rows:
+            self.store.add_many(rows)
+
+    def _loop(self):
+        while True:
+            with self.cond:
+                self.cond.wait_for(lambda: len(self.rows) >= self.max_rows or not self.running, self.interval)
+                rows, self.rows = self.rows, []
+                running = self.running
+            if rows:
+                self.store.add_many(rows)
+            if not running:
+                return
+
+    def close(self):
+        with self.cond:
+            self.running = False
+            self.cond.notify()
+        self.thread.join()
+
+def migrate_text_history(store, path=LEGACY_HISTORY, image_dir=None, rename=True):
+    """Chuyển plate_history.txt (mỗi dòng `filename,plate`) vào SQLite, trả về số bản ghi."""
+    if not os.path.exists(path):
+        return 0
+    rows = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if "," not in line:
+                continue
+            filename, plate = line.strip().split(",", 1)
+            default_ts = None
+            if image_dir and os.path.exists(os.path.join(image_dir, filename)):
+                default_ts = os.path.getmtime(os.path.join(image_dir, filename))
+            rows.append((filename, plate, "", "legacy", timestamp_from_filename(filename, default_ts), None))
+    for start in range(0, len(rows), 10000):
+        store.add_many(rows[start:start + 10000])
+    if rename:
+        os.replace(path, path + ".migrated")
+    return len(rows)
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_store(path=DB_PATH):
+    """Store dùng chung trong process (mở lần đầu khi cần)."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = DetectionStore(path)
+        return _store
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="migrate plate_history.txt into the SQLite detection store")
+    ap.add_argument("--history", default=LEGACY_HISTORY)
+    ap.add_argument("--db", default=DB_PATH)
+    ap.add_argument("--image-dir", default=None, help="history_image directory, used for timestamps of unparsable names")
+    ap.add_argument("--keep", action="store_true", help="do not rename the text file after migrating")
+    args = ap.parse_args()
+    count = migrate_text_history(DetectionStore(args.db), args.history, args.image_dir, not args.keep)
+    print(f"migrated {count} rows into {args.db}")
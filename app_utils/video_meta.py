@@ -0,0 +1,107 @@
+import json
+import os
+import threading
+
+import cv2
+
+CACHE_NAME = "video_meta.json"
+
+def probe_video(video_path):
+    """Đọc FPS, số frame và độ phân giải bằng cách mở video (chậm, chỉ dùng khi cache chưa có)."""
+    cap = cv2.VideoCapture(video_path)
+    try:
+        if not cap.isOpened():
+            return {"duration": 0.0, "fps": 0.0, "frames": 0, "width": 0, "height": 0}
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        return {
+            "duration": frames / fps if fps > 0 else 0.0,
+            "fps": fps,
+            "frames": frames,
+            "width": int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+            "height": int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+        }
+    finally:
+        cap.release()
+
+def format_duration(duration_sec):
+    minutes = int(duration_sec // 60)
+    seconds = int(duration_sec % 60)
+    return f"{minutes:02d}:{seconds:02d}"
+
+class VideoMetaCache:
+    """Metadata của các video trong một thư mục, lưu trong video_meta.json cạnh video.
+
+    Mỗi mục được gắn với mtime và kích thước file; nếu file thay đổi thì metadata
+    được đọc lại từ video.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.path = os.path.join(directory, CACHE_NAME)
+        self.lock = threading.Lock()
+        self.entries = self._load()
+        self.dirty = False
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _stat(self, name):
+        st = os.stat(os.path.join(self.directory, name))
+        return st.st_mtime, st.st_size
+
+    def get(self, name):
+        """Metadata của video `name`, chỉ mở video khi cache không còn khớp."""
+        try:
+            mtime, size = self._stat(name)
+        except OSError:
+            return None
+        with self.lock:
+            meta = self.entries.get(name)
+        if meta is not None and meta.get("mtime") == mtime and meta.get("size") == size:
+            return meta
+        meta = dict(meta or {}, **probe_video(os.path.join(self.directory, name)))
+        meta.update(mtime=mtime, size=size)
+        with self.lock:
+            self.entries[name] = meta
+            self.dirty = True
+        return meta
+
+    def put(self, name, **meta):
+        """Ghi metadata lúc tạo video (duration, fps, frames, width, height, start_time, events)."""
+        mtime, size = self._stat(name)
+        with self.lock:
+            self.entries[name] = dict(meta, mtime=mtime, size=size)
+            self.dirty = True
+        self.save()
+
+    def save(self):
+        with self.lock:
+            if not self.dirty:
+                return
+            # Gộp với các mục do process khác ghi rồi thay file một cách nguyên tử
+            entries = self._load()
+            entries.update(self.entries)
+            names = set(os.listdir(self.directory))
+            entries = {k: v for k, v in entries.items() if k in names}
+            tmp = self.path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(entries, f, ensure_ascii=False)
+            os.replace(tmp, self.path)
+            self.entries = entries
+            self.dirty = False
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+def get_cache(directory):
+    """Cache dùng chung cho mỗi thư mục video trong process."""
+    with _caches_lock:
+        cache = _caches.get(directory)
+        if cache is None:
+            cache = _caches[directory] = VideoMetaCache(directory)
+        return cache
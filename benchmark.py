@@ -0,0 +1,184 @@
+import argparse
+import glob
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+import cv2
+import numpy as np
+
+import app_utils.models as models
+from app_utils.process import crop_plate, detect_plates, recognize_plates
+from function.helper import read_plates
+from function.utils_rotate import DESKEW_VARIANTS, deskew_variants
+
+class StageTimer:
+    def __init__(self):
+        self.samples = defaultdict(list)
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        yield
+        self.samples[name].append((time.perf_counter() - start) * 1000)
+
+    def summary(self):
+        result = {}
+        for name, values in self.samples.items():
+            values = np.asarray(values)
+            result[name] = {
+                "count": int(values.size),
+                "mean_ms": round(float(values.mean()), 3),
+                "p50_ms": round(float(np.percentile(values, 50)), 3),
+                "p95_ms": round(float(np.percentile(values, 95)), 3),
+                "p99_ms": round(float(np.percentile(values, 99)), 3),
+            }
+        return result
+
+def peak_rss_mb():
+    try:
+        import resource
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # kilobytes on Linux, bytes on macOS
+        return round(rss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+    except ImportError:
+        try:
+            import psutil
+            return round(psutil.Process().memory_info().peak_wset / (1024 * 1024), 1)
+        except (ImportError, AttributeError):
+            return None
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=models.BASE_DIR, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def load_corpus(patterns):
+    frames = []
+    for pattern in patterns:
+        for path in sorted(glob.glob(pattern)):
+            img = cv2.imread(path)
+            if img is not None:
+                frames.append(img)
+    return frames
+
+def synthetic_video(frames, path, n_frames, size=(1280, 720), fps=30):
+    # pans slowly across the corpus images so the tracker-free pipeline sees moving plates
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), fps, size)
+    for i in range(n_frames):
+        img = cv2.resize(frames[(i // fps) % len(frames)], size)
+        shift = np.float32([[1, 0, (i % fps) * 2], [0, 1, 0]])
+        writer.write(cv2.warpAffine(img, shift, size))
+    writer.release()
+
+def run_frame(frame, timer, all_variants=False):
+    with timer.stage("detection"):
+        plates = detect_plates(frame)
+    with timer.stage("crop"):
+        crops = [crop_plate(frame, plate) for plate in plates]
+    # the real OCR path: deskew variants tried in retry order until each plate is read
+    with timer.stage("ocr"):
+        lps = recognize_plates(crops)
+    if all_variants:
+        for crop in crops:
+            if crop.size == 0:
+                continue
+            variants = deskew_variants(crop, DESKEW_VARIANTS)
+            images = []
+            while True:
+                with timer.stage("deskew_variant"):
+                    item = next(variants, None)
+                if item is None:
+                    break
+                images.append(item[1])
+            # worst case: OCR over every distinct variant of the plate in one batch
+            with timer.stage("ocr_all_variants"):
+                read_plates(models.get_ocr(), images)
+    with timer.stage("drawing"):
+        for plate in plates:
+            cv2.rectangle(frame, (int(plate[0]), int(plate[1])), (int(plate[2]), int(plate[3])), color=(0, 0, 225), thickness=2)
+        for plate, lp in zip(plates, lps):
+            cv2.putText(frame, lp, (int(plate[0]), int(plate[1] - 10)), cv2.FONT_HERSHEY_SIMPLEX, 0.9, (36, 255, 12), 2)
+    with timer.stage("encoding"):
+        cv2.imencode(".jpg", frame)
+
+def compare(current, previous_path):
+    with open(previous_path, "r", encoding="utf-8") as f:
+        previous = json.load(f)
+    print(f"\ncompared with {previous_path} ({previous.get('commit')})")
+    for name, stats in current["stages"].items():
+        old = previous.get("stages", {}).get(name)
+        if old:
+            delta = (stats["p50_ms"] - old["p50_ms"]) / max(old["p50_ms"], 1e-6) * 100
+            print(f"  {name:<16} p50 {old['p50_ms']:>9.2f} -> {stats['p50_ms']:>9.2f} ms ({delta:+.1f}%)")
+
+def main():
+    ap = argparse.ArgumentParser(description='per-stage latency benchmark of the recognition pipeline')
+    ap.add_argument('--images', nargs='+', default=[os.path.join(models.BASE_DIR, 'result', '*.jpg'),
+                                                   os.path.join(models.BASE_DIR, 'history_image', '*.jpg')])
+    ap.add_argument('--video-frames', type=int, default=150, help='length of the synthetic video (0 to skip)')
+    ap.add_argument('--repeat', type=int, default=3, help='passes over the image corpus')
+    ap.add_argument('--warmup', type=int, default=2, help='untimed frames before measuring')
+    ap.add_argument('--all-variants', action='store_true', help='also time OCR over every deskew variant (worst case, counted in end_to_end)')
+    ap.add_argument('-o', '--output', default=None, help='save results as JSON')
+    ap.add_argument('--compare', default=None, help='previous JSON result to compare with')
+    args = ap.parse_args()
+
+    frames = load_corpus(args.images)
+    if not frames:
+        sys.exit("empty corpus")
+    timer = StageTimer()
+    for frame in frames[:args.warmup]:
+        run_frame(frame.copy(), StageTimer())
+
+    n_frames = 0
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        for frame in frames:
+            with timer.stage("end_to_end"):
+                run_frame(frame.copy(), timer, args.all_variants)
+            n_frames += 1
+    if args.video_frames > 0:
+        video_path = os.path.join(models.BASE_DIR, "benchmark_synthetic.mp4")
+        synthetic_video(frames, video_path, args.video_frames)
+        cap = cv2.VideoCapture(video_path)
+        while True:
+            with timer.stage("video_decode"):
+                ret, frame = cap.read()
+            if not ret:
+                break
+            with timer.stage("end_to_end"):
+                run_frame(frame, timer, args.all_variants)
+            n_frames += 1
+        cap.release()
+        os.remove(video_path)
+    elapsed = time.perf_counter() - start
+
+    result = {
+        "commit": git_commit(),
+        "backend": models.BACKEND,
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "frames": n_frames,
+        "throughput_fps": round(n_frames / elapsed, 2),
+        "peak_rss_mb": peak_rss_mb(),
+        "stages": timer.summary(),
+    }
+    print(f"{n_frames} frames, {result['throughput_fps']} fps, peak RSS {result['peak_rss_mb']} MB")
+    print(f"{'stage':<16}{'count':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name, stats in result["stages"].items():
+        print(f"{name:<16}{stats['count']:>7}{stats['p50_ms']:>10.2f}{stats['p95_ms']:>10.2f}{stats['p99_ms']:>10.2f}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+    if args.compare:
+        compare(result, args.compare)
+
+if __name__ == '__main__':
+    main()
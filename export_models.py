@@ -0,0 +1,112 @@
+import argparse
+import glob
+import json
+import os
+
+import cv2
+import numpy as np
+import torch
+
+import app_utils.models as models
+from app_utils.backends import names_path
+from function.helper import read_plate, to_numpy
+from function.tracker import iou
+
+class ExportWrapper(torch.nn.Module):
+    # yolov5 returns (pred, feature maps) in eval mode, keep only pred (batch, anchors, 5 + nc)
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, x):
+        out = self.model(x)
+        return out[0] if isinstance(out, (list, tuple)) else out
+
+def set_dynamic(module, dynamic):
+    # yolov5 Detect rebuilds its anchor grid from the input shape when dynamic is set,
+    # so an ONNX graph traced this way accepts any H, W (multiple of 32)
+    for m in module.modules():
+        if type(m).__name__ in ("Detect", "Segment") and hasattr(m, "dynamic"):
+            m.dynamic = dynamic
+
+def torch_module(hub_model):
+    # AutoShape -> DetectMultiBackend (newer yolov5) or Model (older yolov5)
+    module = hub_model.model
+    if hasattr(module, "pt") and hasattr(module, "model"):
+        module = module.model
+    return module.float().eval()
+
+def export(name, formats, size, opset):
+    hub_model = models.get_model(name, "torch")
+    wrapper = ExportWrapper(torch_module(hub_model)).eval()
+    dummy = torch.zeros(1, 3, size, size)
+    names = hub_model.names
+    names = [names[i] for i in sorted(names)] if isinstance(names, dict) else list(names)
+    for fmt in formats:
+        path = models.exported_path(name, fmt)
+        if fmt == "onnx":
+            # batch, height and width are dynamic so the adaptive detector size works with ONNX too
+            set_dynamic(wrapper, True)
+            torch.onnx.export(wrapper, dummy, path, opset_version=opset, input_names=["images"], output_names=["output"],
+                              dynamic_axes={"images": {0: "batch", 2: "height", 3: "width"},
+                                            "output": {0: "batch", 1: "anchors"}})
+            set_dynamic(wrapper, False)
+        else:
+            # TorchScript traces the anchor grid for `size`, the model stays fixed-size
+            with torch.no_grad():
+                torch.jit.trace(wrapper, dummy).save(path)
+        with open(names_path(path), "w", encoding="utf-8") as f:
+            json.dump(names, f, ensure_ascii=False)
+        print(f"exported {name} -> {path}")
+
+def match_error(ref, det):
+    # mean IoU of every reference box with its best match, and number of missing boxes
+    if len(ref) == 0:
+        return 1.0, len(det)
+    if len(det) == 0:
+        return 0.0, len(ref)
+    best = [iou(r[:4], det[:, :4]).max() for r in ref]
+    return float(np.mean(best)), abs(len(ref) - len(det))
+
+def parity(formats, images, size):
+    for fmt in formats:
+        ious = []
+        count_diff = 0
+        plates = 0
+        same_plate = 0
+        for path in images:
+            img = cv2.imread(path)
+            if img is None:
+                continue
+            ref = to_numpy(models.get_detector("torch")(img, size=size).xyxy[0])
+            det = to_numpy(models.get_detector(fmt)(img, size=size).xyxy[0])
+            mean_iou, diff = match_error(ref, det)
+            ious.append(mean_iou)
+            count_diff += diff
+            # OCR parity on the plates found by the torch detector
+            for box in ref:
+                x1, y1, x2, y2 = (max(int(v), 0) for v in box[:4])
+                crop = img[y1:y2, x1:x2]
+                if crop.size == 0:
+                    continue
+                plates += 1
+                same_plate += read_plate(models.get_ocr("torch"), crop) == read_plate(models.get_ocr(fmt), crop)
+        print(f"[{fmt}] detector mean IoU vs torch: {np.mean(ious) if ious else 0:.4f}, box count diff: {count_diff}, "
+              f"identical read_plate strings: {same_plate}/{plates}")
+
+def main():
+    ap = argparse.ArgumentParser(description='export detector/OCR checkpoints to ONNX or TorchScript and check parity')
+    ap.add_argument('-f', '--formats', nargs='+', choices=['onnx', 'torchscript'], default=['onnx'])
+    ap.add_argument('--size', type=int, default=640, help='input size of the TorchScript export and of the ONNX trace (ONNX accepts any size)')
+    ap.add_argument('--opset', type=int, default=12)
+    ap.add_argument('--check', default=os.path.join(models.BASE_DIR, 'result', '*.jpg'), help='images for the parity check')
+    ap.add_argument('--no-check', action='store_true')
+    args = ap.parse_args()
+
+    for name in ("detector", "ocr"):
+        export(name, args.formats, args.size, args.opset)
+    if not args.no_check:
+        parity(args.formats, sorted(glob.glob(args.check)), args.size)
+
+if __name__ == '__main__':
+    main()
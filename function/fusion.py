@@ -0,0 +1,57 @@
+from collections import Counter
+
+class PlateFusion:
+    # fuse per-character OCR confidences of one track over several frames
+    def __init__(self, min_frames=3, stable_frames=2, min_conf=0.5):
+        self.min_frames = min_frames
+        self.stable_frames = stable_frames
+        self.min_conf = min_conf
+        self.layouts = {}
+        self.frames = 0
+        self.last = None
+        self.stable_count = 0
+
+    def add(self, lines):
+        # lines: [[(char, conf), ...], ...] as returned by read_plate(..., detail=True)
+        key = tuple(len(line) for line in lines)
+        layout = self.layouts.setdefault(key, {"count": 0, "scores": [Counter() for _ in range(sum(key))]})
+        layout["count"] += 1
+        pos = 0
+        for line in lines:
+            for char, conf in line:
+                layout["scores"][pos][char] += conf
+                pos += 1
+        self.frames += 1
+
+        plate, _ = self.reading()
+        if plate == self.last:
+            self.stable_count += 1
+        else:
+            self.last = plate
+            self.stable_count = 1
+
+    def reading(self):
+        # (plate, confidence) of the best supported layout, confidence in [0, 1]
+        if not self.layouts:
+            return None, 0.0
+        key, layout = max(self.layouts.items(), key=lambda kv: (kv[1]["count"], sum(sum(c.values()) for c in kv[1]["scores"])))
+        chars = []
+        score = 0.0
+        for counter in layout["scores"]:
+            char, total = counter.most_common(1)[0]
+            chars.append(char)
+            score += total
+        # weight by the share of frames that agree on the layout
+        confidence = score / (len(chars) * self.frames) if chars else 0.0
+        parts = []
+        start = 0
+        for n in key:
+            parts.append("".join(chars[start:start + n]))
+            start += n
+        return "-".join(parts), confidence
+
+    @property
+    def stable(self):
+        _, confidence = self.reading()
+        return (self.frames >= self.min_frames and self.stable_count >= self.stable_frames
+                and confidence >= self.min_conf)
@@ -1,4 +1,5 @@
 import math
+import numpy as np
 
 # license plate type classification helper function
 def linear_equation(x1, y1, x2, y2):
@@ -11,54 +12,59 @@ def check_point_linear(x, y, x1, y1, x2, y2):
     y_pred = a*x+b
     return(math.isclose(y_pred, y, abs_tol = 3))
 
-# detect character and number in license plate
-def read_plate(yolo_license_plate, im):
-    LP_type = "1"
-    results = yolo_license_plate(im)
-    bb_list = results.pandas().xyxy[0].values.tolist()
-    if len(bb_list) == 0 or len(bb_list) < 7 or len(bb_list) > 10:
-        return "unknown"
-    center_list = []
-    y_mean = 0
-    y_sum = 0
-    for bb in bb_list:
-        x_c = (bb[0]+bb[2])/2
-        y_c = (bb[1]+bb[3])/2
-        y_sum += y_c
-        center_list.append([x_c,y_c,bb[-1]])
+def to_numpy(det):
+    # yolov5 results hold torch tensors (maybe on GPU), ONNX outputs are arrays
+    if hasattr(det, "cpu"):
+        det = det.cpu().numpy()
+    return np.asarray(det, dtype=np.float32).reshape(-1, 6)
 
-    # find 2 point to draw line
-    l_point = center_list[0]
-    r_point = center_list[0]
-    for cp in center_list:
-        if cp[0] < l_point[0]:
-            l_point = cp
-        if cp[0] > r_point[0]:
-            r_point = cp
-    for ct in center_list:
-        if l_point[0] != r_point[0]:
-            if (check_point_linear(ct[0], ct[1], l_point[0], l_point[1], r_point[0], r_point[1]) == False):
-                LP_type = "2"
+# order character boxes (x1, y1, x2, y2, conf, cls) into plate lines
+def plate_lines(det):
+    n = len(det)
+    if n < 7 or n > 10:
+        return None
+    x_c = (det[:, 0] + det[:, 2]) / 2
+    y_c = (det[:, 1] + det[:, 3]) / 2
 
-    y_mean = int(int(y_sum) / len(bb_list))
-    size = results.pandas().s
+    # line through the left-most and right-most character centers
+    l_idx = int(np.argmin(x_c))
+    r_idx = int(np.argmax(x_c))
+    LP_type = "1"
+    if x_c[l_idx] != x_c[r_idx]:
+        slope = (y_c[r_idx] - y_c[l_idx]) / (x_c[r_idx] - x_c[l_idx])
+        y_pred = y_c[l_idx] + slope * (x_c - x_c[l_idx])
+        if np.any(np.abs(y_pred - y_c) > 3):
+            LP_type = "2"
 
+    order = np.argsort(x_c, kind="stable")
+    if LP_type == "1":
+        return [order]
     # 1 line plates and 2 line plates
-    line_1 = []
-    line_2 = []
-    license_plate = ""
-    if LP_type == "2":
-        for c in center_list:
-            if int(c[1]) > y_mean:
-                line_2.append(c)
-            else:
-                line_1.append(c)
-        for l1 in sorted(line_1, key = lambda x: x[0]):
-            license_plate += str(l1[2])
-        license_plate += "-"
-        for l2 in sorted(line_2, key = lambda x: x[0]):
-            license_plate += str(l2[2])
-    else:
-        for l in sorted(center_list, key = lambda x: x[0]):
-            license_plate += str(l[2])
-    return license_plate
\ No newline at end of file
+    y_mean = int(int(y_c.sum()) / n)
+    lower = y_c.astype(np.int64)[order] > y_mean
+    return [order[~lower], order[lower]]
+
+# build the plate string from the raw detections of one image,
+# with detail=True also return the (char, confidence) pairs of each line
+def decode_plate(det, names, detail=False):
+    det = to_numpy(det)
+    lines = plate_lines(det)
+    if lines is None:
+        return ("unknown", None) if detail else "unknown"
+    cls = det[:, 5].astype(np.int64)
+    chars = [[(str(names[cls[i]]), float(det[i, 4])) for i in idx] for idx in lines]
+    license_plate = "-".join("".join(c for c, _ in line) for line in chars)
+    return (license_plate, chars) if detail else license_plate
+
+# detect character and number in license plate
+def read_plate(yolo_license_plate, im, detail=False):
+    results = yolo_license_plate(im)
+    return decode_plate(results.xyxy[0], results.names, detail)
+
+# detect characters of many plate images in one forward pass
+def read_plates(yolo_license_plate, ims, detail=False):
+    if len(ims) == 0:
+        return []
+    # AutoShape letterboxes every image of the list into one tensor batch
+    results = yolo_license_plate(list(ims))
+    return [decode_plate(det, results.names, detail) for det in results.xyxy]
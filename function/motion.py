@@ -0,0 +1,46 @@
+import time
+import cv2
+import numpy as np
+
+class MotionGate:
+    # cheap pre-filter telling whether a frame is worth running detection on.
+    # method "diff" compares consecutive downscaled frames, "mog2" uses background subtraction.
+    # min_area is the fraction of changed pixels needed to count as motion (lower = more sensitive),
+    # keepalive_sec forces a detection every few seconds even on a static scene (None to disable)
+    def __init__(self, threshold=25, min_area=0.002, scale_width=160, method="diff", keepalive_sec=5.0):
+        self.threshold = threshold
+        self.min_area = min_area
+        self.scale_width = scale_width
+        self.method = method
+        self.keepalive_sec = keepalive_sec
+        self.prev = None
+        self.last_pass = None
+        self.skipped = 0
+        if method == "mog2":
+            self.subtractor = cv2.createBackgroundSubtractorMOG2(history=300, varThreshold=threshold, detectShadows=False)
+
+    def _changed_ratio(self, gray):
+        if self.method == "mog2":
+            mask = self.subtractor.apply(gray)
+            return np.count_nonzero(mask) / mask.size
+        if self.prev is None:
+            self.prev = gray
+            return 1.0
+        diff = cv2.absdiff(gray, self.prev)
+        self.prev = gray
+        # fraction of pixels that changed noticeably
+        return np.count_nonzero(diff > self.threshold) / diff.size
+
+    def __call__(self, frame, now=None):
+        now = time.monotonic() if now is None else now
+        h, w = frame.shape[:2]
+        small = cv2.resize(frame, (self.scale_width, max(int(h * self.scale_width / w), 1)), interpolation=cv2.INTER_AREA)
+        gray = cv2.GaussianBlur(cv2.cvtColor(small, cv2.COLOR_BGR2GRAY), (5, 5), 0)
+        moving = self._changed_ratio(gray) >= self.min_area
+        if not moving and self.keepalive_sec is not None and (self.last_pass is None or now - self.last_pass >= self.keepalive_sec):
+            moving = True
+        if moving:
+            self.last_pass = now
+        else:
+            self.skipped += 1
+        return moving
@@ -0,0 +1,138 @@
+import bisect
+import threading
+from collections import Counter, defaultdict
+
+# characters the OCR model often confuses are folded to one representative
+CONFUSIONS = str.maketrans({"O": "0", "D": "0", "Q": "0", "B": "8", "S": "5", "I": "1", "L": "1", "Z": "2", "G": "6"})
+
+def fold(plate):
+    # "51F-123.45" -> "51F12345" with confusable characters folded
+    return "".join(c for c in plate.upper() if c.isalnum()).translate(CONFUSIONS)
+
+def grams(text, n=2):
+    return {text[i:i + n] for i in range(len(text) - n + 1)} if len(text) >= n else {text}
+
+def edit_distance(a, b, max_dist):
+    # banded Levenshtein, returns max_dist + 1 as soon as the distance is known to exceed max_dist
+    if abs(len(a) - len(b)) > max_dist:
+        return max_dist + 1
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        cur = [i] + [max_dist + 1] * len(b)
+        lo = max(1, i - max_dist)
+        hi = min(len(b), i + max_dist)
+        for j in range(lo, hi + 1):
+            cost = 0 if ca == b[j - 1] else 1
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + cost)
+        if min(cur) > max_dist:
+            return max_dist + 1
+        prev = cur
+    return prev[-1]
+
+class PlateSearchIndex:
+    # prefix / substring / fuzzy search over plate strings, each plate maps to many keys (e.g. file names)
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.keys = defaultdict(list)    # folded plate -> keys
+        self.sorted_plates = []          # folded plates, sorted, for prefix search
+        self.trigrams = defaultdict(set) # trigram -> folded plates, for substring search
+        self.bigrams = defaultdict(set)  # bigram -> folded plates, candidate filter for fuzzy search
+        self.by_length = defaultdict(set)
+
+    def __len__(self):
+        return sum(len(v) for v in self.keys.values())
+
+    def _index(self, folded):
+        # caller holds the lock and keeps sorted_plates sorted
+        for g in grams(folded, 3):
+            self.trigrams[g].add(folded)
+        for g in grams(folded):
+            self.bigrams[g].add(folded)
+        self.by_length[len(folded)].add(folded)
+
+    def add(self, plate, key):
+        folded = fold(plate)
+        if not folded:
+            return
+        with self.lock:
+            if folded not in self.keys:
+                bisect.insort(self.sorted_plates, folded)
+                self._index(folded)
+            self.keys[folded].append(key)
+
+    # bulk insert: new plates are appended and sorted_plates is sorted once per call
+    def add_many(self, items):
+        folded_items = [(fold(plate), key) for plate, key in items]
+        with self.lock:
+            added = False
+            for folded, key in folded_items:
+                if not folded:
+                    continue
+                if folded not in self.keys:
+                    self.sorted_plates.append(folded)
+                    self._index(folded)
+                    added = True
+                self.keys[folded].append(key)
+            if added:
+                self.sorted_plates.sort()
+
+    # same rule as search(mode="prefix"/"substring") for a single plate, without touching the index
+    @staticmethod
+    def matches(query, plate):
+        q, p = fold(query), fold(plate)
+        return bool(q) and (p.startswith(q) or len(q) >= 3 and q in p)
+
+    def prefix(self, query):
+        q = fold(query)
+        with self.lock:
+            i = bisect.bisect_left(self.sorted_plates, q)
+            result = []
+            while i < len(self.sorted_plates) and self.sorted_plates[i].startswith(q):
+                result.append(self.sorted_plates[i])
+                i += 1
+        return result
+
+    def substring(self, query):
+        q = fold(query)
+        if len(q) < 3:
+            # too short for trigrams, prefix search is the useful case here
+            return self.prefix(query)
+        with self.lock:
+            sets = sorted((self.trigrams.get(g, set()) for g in grams(q, 3)), key=len)
+            candidates = set(sets[0]).intersection(*sets[1:]) if sets else set()
+        return [p for p in candidates if q in p]
+
+    def fuzzy(self, query, max_dist=1):
+        q = fold(query)
+        q_grams = grams(q)
+        result = []
+        # each edit destroys at most two bigrams of the query
+        min_shared = len(q_grams) - 2 * max_dist
+        with self.lock:
+            if min_shared > 0:
+                counts = Counter()
+                for g in q_grams:
+                    counts.update(self.bigrams.get(g, ()))
+                candidates = [p for p, n in counts.items() if n >= min_shared]
+            else:
+                candidates = [p for length in range(len(q) - max_dist, len(q) + max_dist + 1)
+                              for p in self.by_length.get(length, ())]
+            for p in candidates:
+                if edit_distance(q, p, max_dist) <= max_dist:
+                    result.append(p)
+        return result
+
+    # keys whose plate matches the query; auto = prefix + substring, then fuzzy if nothing matched
+    def search(self, query, max_dist=1, mode="auto"):
+        if mode == "prefix":
+            plates = self.prefix(query)
+        elif mode == "substring":
+            plates = self.substring(query)
+        elif mode == "fuzzy":
+            plates = self.fuzzy(query, max_dist)
+        else:
+            plates = set(self.prefix(query)) | set(self.substring(query))
+            if not plates and len(fold(query)) >= 4:
+                plates = self.fuzzy(query, max_dist)
+        with self.lock:
+            return [key for p in plates for key in self.keys.get(p, ())]
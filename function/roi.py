@@ -0,0 +1,54 @@
+import json
+import os
+import cv2
+import numpy as np
+
+# read per camera regions of interest: {"<camera source>": [[[x, y], ...], ...], ...}
+def load_rois(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return {str(k): v for k, v in json.load(f).items()}
+
+class DetectionRegion:
+    # crops detection to the bounding box of the ROI polygons and picks the
+    # detector input size from the plate heights seen in the previous frames
+    def __init__(self, polygons=None, adaptive=True, sizes=(320, 416, 512, 640, 800), default_size=640, target_plate_h=40):
+        self.polygons = [np.asarray(p, dtype=np.int32).reshape(-1, 2) for p in (polygons or [])]
+        self.adaptive = adaptive
+        self.sizes = sorted(sizes)
+        self.default_size = default_size
+        self.target_plate_h = target_plate_h
+        self.last_plate_h = None
+
+    def crop(self, frame):
+        # returns the image to run detection on and its (x, y) offset in the frame
+        if not self.polygons:
+            return frame, (0, 0)
+        h, w = frame.shape[:2]
+        points = np.concatenate(self.polygons)
+        x1, y1 = np.clip(points.min(axis=0), 0, [w, h])
+        x2, y2 = np.clip(points.max(axis=0), 0, [w, h])
+        return frame[y1:y2, x1:x2], (int(x1), int(y1))
+
+    def size_for(self, image):
+        if not self.adaptive or self.last_plate_h is None:
+            return self.default_size
+        long_side = max(image.shape[:2])
+        # without an ROI the whole frame is the input, never upscale it past the old fixed size
+        sizes = self.sizes if self.polygons else [s for s in self.sizes if s <= self.default_size] or [self.default_size]
+        # smallest input size where the smallest plate is still target_plate_h pixels high
+        for size in sizes:
+            if self.last_plate_h * size / long_side >= self.target_plate_h:
+                return size
+        return sizes[-1]
+
+    def inside(self, box):
+        if not self.polygons:
+            return True
+        center = ((box[0] + box[2]) / 2, (box[1] + box[3]) / 2)
+        return any(cv2.pointPolygonTest(p, center, False) >= 0 for p in self.polygons)
+
+    def observe(self, boxes):
+        # remember the smallest plate height, frames without plates fall back to the default size
+        self.last_plate_h = min((b[3] - b[1] for b in boxes), default=None)
@@ -0,0 +1,111 @@
+import numpy as np
+from function.fusion import PlateFusion
+
+# intersection over union between one box and an array of boxes (x1, y1, x2, y2)
+def iou(box, boxes):
+    boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+    x1 = np.maximum(box[0], boxes[:, 0])
+    y1 = np.maximum(box[1], boxes[:, 1])
+    x2 = np.minimum(box[2], boxes[:, 2])
+    y2 = np.minimum(box[3], boxes[:, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area = (box[2] - box[0]) * (box[3] - box[1])
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    return inter / np.maximum(area + areas - inter, 1e-6)
+
+class Track:
+    def __init__(self, track_id, bbox):
+        self.id = track_id
+        self.bbox = bbox
+        self.hits = 1
+        self.missed = 0
+        self.frames_since_ocr = None
+        self.fusion = PlateFusion()
+        self.plate = None
+        self.confidence = 0.0
+        self.reported = None
+
+    def add_reading(self, lp, lines=None):
+        # lines: per-character (char, conf) pairs from read_plate(..., detail=True)
+        self.frames_since_ocr = 0
+        if lp == "unknown":
+            return
+        if lines is None:
+            lines = [[(c, 1.0) for c in part] for part in lp.split("-")]
+        self.fusion.add(lines)
+        self.plate, self.confidence = self.fusion.reading()
+
+    @property
+    def stable(self):
+        return self.fusion.stable
+
+class PlateTracker:
+    # IoU / centroid tracker for plate boxes, OCR runs only on new tracks and every ocr_interval frames
+    def __init__(self, iou_thres=0.3, max_missed=15, ocr_interval=10, retry_interval=2):
+        self.iou_thres = iou_thres
+        self.retry_interval = retry_interval
+        self.max_missed = max_missed
+        self.ocr_interval = ocr_interval
+        self.tracks = []
+        self.next_id = 1
+
+    def _match(self, boxes):
+        pairs = []
+        for ti, track in enumerate(self.tracks):
+            overlaps = iou(track.bbox, boxes)
+            tw = track.bbox[2] - track.bbox[0]
+            tc = np.array([(track.bbox[0] + track.bbox[2]) / 2, (track.bbox[1] + track.bbox[3]) / 2])
+            for bi, box in enumerate(boxes):
+                score = overlaps[bi]
+                if score < self.iou_thres:
+                    # fast moving plates: fall back to centroid distance relative to plate width
+                    bc = np.array([(box[0] + box[2]) / 2, (box[1] + box[3]) / 2])
+                    if np.linalg.norm(bc - tc) > tw:
+                        continue
+                    score = self.iou_thres * (1 - np.linalg.norm(bc - tc) / max(tw, 1))
+                pairs.append((score, ti, bi))
+        matches = {}
+        used = set()
+        for score, ti, bi in sorted(pairs, reverse=True):
+            if ti in matches or bi in used:
+                continue
+            matches[ti] = bi
+            used.add(bi)
+        return matches
+
+    def update(self, boxes):
+        # boxes: list of (x1, y1, x2, y2, ...), returns the tracks seen in this frame
+        boxes = [list(b[:4]) for b in boxes]
+        matches = self._match(boxes) if boxes else {}
+        active = []
+        for ti, track in enumerate(self.tracks):
+            if ti in matches:
+                track.bbox = boxes[matches[ti]]
+                track.hits += 1
+                track.missed = 0
+                if track.frames_since_ocr is not None:
+                    track.frames_since_ocr += 1
+                active.append(track)
+            else:
+                track.missed += 1
+        matched = set(matches.values())
+        for bi, box in enumerate(boxes):
+            if bi not in matched:
+                track = Track(self.next_id, box)
+                self.next_id += 1
+                self.tracks.append(track)
+                active.append(track)
+        self.tracks = [t for t in self.tracks if t.missed <= self.max_missed]
+        return active
+
+    def visible(self):
+        # tracks seen in the last processed frame, drawn again on frames where detection is skipped
+        return [t for t in self.tracks if t.missed == 0]
+
+    def needs_ocr(self, track):
+        if track.frames_since_ocr is None:
+            return True
+        # tracks without a stable reading yet are read more often
+        if not track.stable:
+            return track.frames_since_ocr >= self.retry_interval
+        return track.frames_since_ocr >= self.ocr_interval
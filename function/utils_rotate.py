@@ -17,7 +17,7 @@ def rotate_image(image, angle):
     result = cv2.warpAffine(image, rot_mat, image.shape[1::-1], flags=cv2.INTER_LINEAR)
     return result
 
-def compute_skew(src_img, center_thres):
+def find_lines(src_img):
     if len(src_img.shape) == 3:
         h, w, _ = src_img.shape
     elif len(src_img.shape) == 2:
@@ -26,7 +26,9 @@ def compute_skew(src_img, center_thres):
         print('upsupported image type')
     img = cv2.medianBlur(src_img, 3)
     edges = cv2.Canny(img,  threshold1 = 30,  threshold2 = 100, apertureSize = 3, L2gradient = True)
-    lines = cv2.HoughLinesP(edges, 1, math.pi/180, 30, minLineLength=w / 1.5, maxLineGap=h/3.0)
+    return cv2.HoughLinesP(edges, 1, math.pi/180, 30, minLineLength=w / 1.5, maxLineGap=h/3.0)
+
+def skew_from_lines(lines, center_thres):
     if lines is None:
         return 1
 
@@ -54,9 +56,46 @@ def compute_skew(src_img, center_thres):
         return 0.0
     return (angle / cnt)*180/math.pi
 
+def compute_skew(src_img, center_thres):
+    return skew_from_lines(find_lines(src_img), center_thres)
+
 def deskew(src_img, change_cons, center_thres):
     if change_cons == 1:
         return rotate_image(src_img, compute_skew(changeContrast(src_img), center_thres))
     else:
         return rotate_image(src_img, compute_skew(src_img, center_thres))
 
+# (change_cons, center_thres) combinations tried when reading a plate
+DESKEW_VARIANTS = [(0, 0), (0, 1), (1, 0), (1, 1)]
+
+def deskew_variants(src_img, variants=DESKEW_VARIANTS):
+    # lazily yield (variant, rotated image); the CLAHE image and the Hough
+    # lines are computed once per contrast mode and angles already tried are skipped
+    sources = {}
+    lines = {}
+    tried = set()
+    for change_cons, center_thres in variants:
+        if change_cons not in lines:
+            sources[change_cons] = changeContrast(src_img) if change_cons == 1 else src_img
+            lines[change_cons] = find_lines(sources[change_cons])
+        angle = skew_from_lines(lines[change_cons], center_thres)
+        if round(angle, 3) in tried:
+            continue
+        tried.add(round(angle, 3))
+        yield (change_cons, center_thres), rotate_image(src_img, angle)
+
+class DeskewRetryPolicy:
+    # orders deskew variants by the success rate observed at runtime
+    def __init__(self, variants=DESKEW_VARIANTS):
+        self.variants = list(variants)
+        self.tries = {v: 0 for v in self.variants}
+        self.hits = {v: 0 for v in self.variants}
+
+    def order(self):
+        # Laplace smoothing keeps the default order until there is evidence
+        return sorted(self.variants, key=lambda v: -(self.hits[v] + 1) / (self.tries[v] + 2))
+
+    def record(self, variant, success):
+        self.tries[variant] += 1
+        if success:
+            self.hits[variant] += 1
@@ -0,0 +1,86 @@
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from multiprocessing import Pool
+
+import cv2
+
+IMAGE_EXTS = ('.jpg', '.jpeg', '.png', '.bmp')
+
+_process_frame = None
+
+def init_worker(threads):
+    # each worker loads the detector and OCR models once
+    global _process_frame
+    from app_utils.models import set_threads, warmup
+    set_threads(threads)
+    from app_utils.process import process_frame
+    warmup()
+    _process_frame = process_frame
+
+def recognize(path):
+    start = time.perf_counter()
+    img = cv2.imread(path)
+    if img is None:
+        return {"path": path, "plates": [], "time_ms": 0.0, "error": "cannot read image"}
+    try:
+        _, plates, _ = _process_frame(img)
+    except Exception as e:
+        return {"path": path, "plates": [], "time_ms": 0.0, "error": str(e)}
+    return {"path": path, "plates": sorted(plates), "time_ms": round((time.perf_counter() - start) * 1000, 2), "error": ""}
+
+def list_images(sources, recursive):
+    for source in sources:
+        if os.path.isdir(source):
+            for root, dirs, files in os.walk(source):
+                for file in sorted(files):
+                    if file.lower().endswith(IMAGE_EXTS):
+                        yield os.path.join(root, file)
+                if not recursive:
+                    break
+        elif source.lower().endswith('.txt'):
+            # file list, one image path per line
+            with open(source, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        yield line.strip()
+        else:
+            yield source
+
+def main():
+    ap = argparse.ArgumentParser(description='recognize license plates of many images with a process pool')
+    ap.add_argument('inputs', nargs='+', help='image directories, images or .txt file lists')
+    ap.add_argument('-o', '--output', default='-', help='output file (default: stdout)')
+    ap.add_argument('-f', '--format', choices=['jsonl', 'csv'], default='jsonl')
+    ap.add_argument('-j', '--workers', type=int, default=os.cpu_count(), help='number of worker processes')
+    ap.add_argument('-t', '--threads', type=int, default=1, help='inference threads per worker (torch or onnxruntime)')
+    ap.add_argument('-r', '--recursive', action='store_true', help='walk sub directories')
+    args = ap.parse_args()
+
+    out = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8', newline='')
+    writer = None
+    if args.format == 'csv':
+        writer = csv.writer(out)
+        writer.writerow(["path", "plates", "time_ms", "error"])
+    count = 0
+    start = time.perf_counter()
+    try:
+        with Pool(args.workers, initializer=init_worker, initargs=(args.threads,)) as pool:
+            for result in pool.imap_unordered(recognize, list_images(args.inputs, args.recursive), chunksize=8):
+                if writer is not None:
+                    writer.writerow([result["path"], ";".join(result["plates"]), result["time_ms"], result["error"]])
+                else:
+                    out.write(json.dumps(result, ensure_ascii=False) + "\n")
+                out.flush()
+                count += 1
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    elapsed = time.perf_counter() - start
+    print(f"{count} images in {elapsed:.1f}s ({count / max(elapsed, 1e-6):.1f} img/s)", file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
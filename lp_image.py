@@ -1,6 +1,5 @@
 from PIL import Image
 import cv2
-import torch
 import math 
 import function.utils_rotate as utils_rotate
 from IPython.display import display
@@ -8,20 +7,19 @@ import os
 import time
 import argparse
 import function.helper as helper
+import app_utils.models as models
+from app_utils.debug_crops import debug_crops
 
 ap = argparse.ArgumentParser()
 ap.add_argument('-i', '--image', required=True, help='path to input image')
 args = ap.parse_args()
 
-yolo_LP_detect = torch.hub.load('yolov5', 'custom', path='model/LP_detector.pt', force_reload=True, source='local')
-yolo_license_plate = torch.hub.load('yolov5', 'custom', path='model/LP_ocr.pt', force_reload=True, source='local')
-yolo_license_plate.conf = 0.60
+yolo_LP_detect = models.get_detector()
+yolo_license_plate = models.get_ocr()
 
 img = cv2.imread(args.image)
 plates = yolo_LP_detect(img, size=640)
-
-plates = yolo_LP_detect(img, size=640)
-list_plates = plates.pandas().xyxy[0].values.tolist()
+list_plates = helper.to_numpy(plates.xyxy[0]).tolist()
 list_read_plates = set()
 if len(list_plates) == 0:
     lp = helper.read_plate(yolo_license_plate,img)
@@ -35,10 +33,9 @@ else:
         y = int(plate[1]) # ymin
         w = int(plate[2] - plate[0]) # xmax - xmin
         h = int(plate[3] - plate[1]) # ymax - ymin  
-        crop_img = img[y:y+h, x:x+w]
+        crop_img = img[y:y+h, x:x+w].copy()
         cv2.rectangle(img, (int(plate[0]),int(plate[1])), (int(plate[2]),int(plate[3])), color = (0,0,225), thickness = 2)
-        cv2.imwrite("crop.jpg", crop_img)
-        rc_image = cv2.imread("crop.jpg")
+        debug_crops.submit(crop_img)
         lp = ""
         for cc in range(0,2):
             for ct in range(0,2):
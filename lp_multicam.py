@@ -0,0 +1,46 @@
+import argparse
+import json
+import sys
+import time
+
+from app_utils.multicam import MultiCameraRunner
+from app_utils.process import HISTORY_DIR
+from app_utils.snapshots import SnapshotWriter
+from app_utils.store import BatchWriter, get_store
+
+ap = argparse.ArgumentParser(description='license plate recognition on several cameras with one shared model')
+ap.add_argument('sources', nargs='+', help='camera sources (URL, RTSP stream or device index)')
+ap.add_argument('--max-fps', type=float, default=5.0, help='frames processed per second per camera')
+ap.add_argument('-b', '--batch-size', type=int, default=None, help='max frames per detection/OCR batch (default: LPR_BATCH_SIZE or 8)')
+ap.add_argument('--max-wait-ms', type=float, default=None, help='max time a frame waits for its batch to fill (default: LPR_BATCH_WAIT_MS or 20)')
+ap.add_argument('--no-motion-gate', action='store_true', help='run detection on static frames too')
+ap.add_argument('--duration', type=float, default=None, help='stop after N seconds (default: run until Ctrl+C)')
+args = ap.parse_args()
+
+sources = [int(s) if s.isdigit() else s for s in args.sources]
+history_writer = BatchWriter(get_store())
+snapshots = SnapshotWriter(HISTORY_DIR, on_saved=lambda snap: history_writer.add(
+    snap.filename, snap.plate, camera=snap.camera, source=snap.source, ts=snap.ts, confidence=snap.confidence))
+
+def on_event(source, plate, frame, bbox, confidence):
+    snapshots.submit(frame, plate, bbox, camera=source, source="multicam", confidence=confidence)
+    print(json.dumps({"time": round(time.time(), 3), "camera": source, "plate": plate,
+                      "confidence": round(confidence, 3)}, ensure_ascii=False), flush=True)
+
+runner = MultiCameraRunner(sources, args.max_fps, args.batch_size, not args.no_motion_gate, on_event=on_event,
+                           max_wait_ms=args.max_wait_ms)
+runner.start()
+start = time.time()
+try:
+    while runner.is_alive() and (args.duration is None or time.time() - start < args.duration):
+        time.sleep(0.5)
+except KeyboardInterrupt:
+    pass
+finally:
+    runner.stop()
+    snapshots.flush()
+    history_writer.close()
+for stream in runner.streams:
+    print(f"{stream.source}: {stream.frames_processed} frames processed", file=sys.stderr)
+for batcher in runner.batchers:
+    print(f"{batcher.name}: {batcher.batches} batches, occupancy {batcher.occupancy:.0%}", file=sys.stderr)
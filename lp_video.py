@@ -0,0 +1,27 @@
+import argparse
+import json
+import sys
+import time
+
+from app_utils.process import analyze_video
+
+ap = argparse.ArgumentParser(description='headless license plate analysis of a recorded video')
+ap.add_argument('-v', '--video', required=True, help='path to input video')
+ap.add_argument('-s', '--stride', type=int, default=1, help='process one frame out of every N')
+ap.add_argument('--start', type=float, default=0.0, help='start time in seconds')
+ap.add_argument('--end', type=float, default=None, help='end time in seconds')
+ap.add_argument('--no-motion-gate', action='store_true', help='run detection on static frames too')
+ap.add_argument('--batched', action='store_true', help='run the models through the micro-batching scheduler')
+ap.add_argument('-o', '--output', default='-', help='timeline output as JSON Lines (default: stdout)')
+args = ap.parse_args()
+
+start = time.perf_counter()
+timeline = analyze_video(args.video, args.stride, args.start, args.end, not args.no_motion_gate, batched=args.batched)
+if timeline is None:
+    sys.exit(f"cannot open video {args.video}")
+out = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8')
+for row in timeline:
+    out.write(json.dumps(row, ensure_ascii=False) + "\n")
+if out is not sys.stdout:
+    out.close()
+print(f"{len(timeline)} timeline rows in {time.perf_counter() - start:.1f}s", file=sys.stderr)
@@ -1,18 +1,31 @@
 import tkinter as tk
-from tkinter import filedialog, messagebox
+from tkinter import filedialog, messagebox, simpledialog
 from tkinter import ttk
 import customtkinter as ctk
 from PIL import Image, ImageTk
 import cv2
 import os
 from app_utils.process import process_image, process_video, process_realtime
+from app_utils.models import warmup
+from app_utils.store import BatchWriter, get_store, migrate_text_history
+from app_utils.snapshots import SnapshotWriter
+from app_utils.history_index import HistoryIndex, sort_key
+from function.plate_search import PlateSearchIndex
+from app_utils.exporter import ExportJob
+from app_utils.video_meta import format_duration, get_cache
 import datetime
+import itertools
 import threading
 
 ctk.set_appearance_mode("System")  
 ctk.set_default_color_theme("blue")  
 
 class ModernLicensePlateApp:
+    # Number of rows loaded into a history list at a time
+    PAGE_SIZE = 100
+    # Placeholder plate values that are not indexed for search
+    NO_PLATE = ("Không xác định", "Không tìm thấy biển số")
+
     def __init__(self, root):
         self.root = root
         self.root.title("Hệ thống Nhận Diện Biển Số Xe")
@@ -49,8 +62,35 @@ class ModernLicensePlateApp:
         self.video_cap = None
         self.detection_history = []
         
+        # Detection history store (migrates the old plate_history.txt once)
+        self.store = get_store()
+        migrate_text_history(self.store, image_dir="D:/hoc_may/License-Plate-Recognition/history_image")
+        self.history_writer = BatchWriter(self.store)
+        
+        # Snapshots are encoded and written on one background thread, saved files are
+        # recorded in the store there and added to the image list by poll_snapshots
+        self.snapshot_writer = SnapshotWriter(
+            "D:/hoc_may/License-Plate-Recognition/history_image", on_saved=self.record_snapshot)
+        
+        # In-memory indexes of the history directories, lists are filled page by page
+        self.image_index = HistoryIndex("D:/hoc_may/License-Plate-Recognition/history_image", ".jpg")
+        self.video_index = HistoryIndex("D:/hoc_may/License-Plate-Recognition/history_video", ".mp4")
+        self.image_filter = None
+        self.video_filter = None
+        self.image_loaded = 0
+        self.video_loaded = 0
+        
+        # Plate search index, built in the background from the detection store
+        self.plate_index = PlateSearchIndex()
+        threading.Thread(target=self.build_plate_index, daemon=True).start()
+        
         # Load initial file lists
         self.update_file_lists()
+        self.root.after(10000, self.schedule_sync)
+        self.root.after(200, self.poll_snapshots)
+        
+        # Load models in the background so the window shows up immediately
+        threading.Thread(target=warmup, daemon=True).start()
 
     def create_main_layout(self):
         """Create the main application layout with modern grid system"""
@@ -139,7 +179,8 @@ class ModernLicensePlateApp:
             textvariable=self.search_var
         )
         self.search_entry.pack(side="left", fill="x", expand=True)
-        self.search_var.trace("w", self.filter_lists)
+        self.search_var.trace("w", self.schedule_filter)
+        self.filter_job = None
         
         # Tabs for images and videos
         self.tab_frame = ctk.CTkFrame(self.sidebar, fg_color="transparent")
@@ -208,7 +249,7 @@ class ModernLicensePlateApp:
             self.image_list_frame,
             columns=("filename", "plate"),
             show="headings",
-            yscrollcommand=self.image_scrollbar.set
+            yscrollcommand=self.on_image_scroll
         )
         
         # Configure columns
@@ -233,7 +274,7 @@ class ModernLicensePlateApp:
             self.video_list_frame,
             columns=("date", "duration"),
             show="headings",
-            yscrollcommand=self.video_scrollbar.set
+            yscrollcommand=self.on_video_scroll
         )
         
         # Configure columns
@@ -261,39 +302,27 @@ class ModernLicensePlateApp:
             self.video_list_frame.pack(fill="both", expand=True)
             self.active_tab = "videos"
 
+    def schedule_filter(self, *args):
+        """Debounce the search box so the lists are filtered once typing pauses"""
+        if self.filter_job is not None:
+            self.root.after_cancel(self.filter_job)
+        self.filter_job = self.root.after(250, self.filter_lists)
+
     def filter_lists(self, *args):
         """Filter the lists based on search input"""
-        search_text = self.search_var.get().lower()
-        
-        # Clear current lists
-        for item in self.image_treeview.get_children():
-            self.image_treeview.delete(item)
-        for item in self.video_treeview.get_children():
-            self.video_treeview.delete(item)
-        
-        image_dir = "D:/hoc_may/License-Plate-Recognition/history_image"
-        video_dir = "D:/hoc_may/License-Plate-Recognition/history_video"
-        
-        # Read plate history
-        plate_history = {}
-        if os.path.exists("D:/hoc_may/License-Plate-Recognition/plate_history.txt"):
-            with open("D:/hoc_may/License-Plate-Recognition/plate_history.txt", "r", encoding="utf-8") as f:
-                for line in f:
-                    filename, plate = line.strip().split(",")
-                    plate_history[filename] = plate
-        
-        # Filter and load images
-        for file in sorted(os.listdir(image_dir), reverse=True):
-            if file.endswith('.jpg') and search_text in file.lower():
-                plate = plate_history.get(file, "Không xác định")
-                self.image_treeview.insert("", "end", values=(file, plate), text=file)
-        
-        # Filter and load videos
-        for file in sorted(os.listdir(video_dir), reverse=True):
-            if file.endswith('.mp4') and search_text in file.lower():
-                date_str = self.get_date_from_filename(file)
-                duration = self.get_video_duration(os.path.join(video_dir, file))
-                self.video_treeview.insert("", "end", values=(date_str, duration), text=file)
+        self.filter_job = None
+        self.reload_lists()
+
+    def build_plate_index(self):
+        """Load all recognized plates of the detection store into the search index"""
+        # Bulk insert in chunks so the index sorts once per chunk instead of once per plate
+        rows = self.store.iter_rows()
+        while True:
+            chunk = list(itertools.islice(rows, 10000))
+            if not chunk:
+                break
+            self.plate_index.add_many((row["plate"], row["filename"]) for row in chunk
+                                      if row["plate"] not in self.NO_PLATE)
 
     def get_date_from_filename(self, filename):
         """Extract date from filename or return file modification date"""
@@ -310,21 +339,10 @@ class ModernLicensePlateApp:
         return datetime.datetime.now().strftime("%d/%m/%Y")
 
     def get_video_duration(self, video_path):
-        """Get duration of video in minutes:seconds format"""
+        """Get duration of video in minutes:seconds format from the metadata cache"""
         try:
-            cap = cv2.VideoCapture(video_path)
-            if not cap.isOpened():
-                return "00:00"
-            
-            fps = cap.get(cv2.CAP_PROP_FPS)
-            frame_count = cap.get(cv2.CAP_PROP_FRAME_COUNT)
-            duration_sec = frame_count / fps if fps > 0 else 0
-            
-            minutes = int(duration_sec // 60)
-            seconds = int(duration_sec % 60)
-            
-            cap.release()
-            return f"{minutes:02d}:{seconds:02d}"
+            meta = get_cache(os.path.dirname(video_path)).get(os.path.basename(video_path))
+            return format_duration(meta["duration"]) if meta else "00:00"
         except:
             return "00:00"
 
@@ -563,44 +581,153 @@ class ModernLicensePlateApp:
         self.ip_entry.pack(side="left")
 
     def update_file_lists(self):
-        """Update the image and video lists from directories"""
-        # Clear current lists
+        """Sync the history indexes with the directories and rebuild the lists"""
+        self.image_index.refresh()
+        self.video_index.refresh()
+        self.reload_lists()
+
+    def reload_lists(self):
+        """Clear both lists and load their first page from the in-memory indexes"""
         for item in self.image_treeview.get_children():
             self.image_treeview.delete(item)
         for item in self.video_treeview.get_children():
             self.video_treeview.delete(item)
         
-        # Load images
-        image_dir = "D:/hoc_may/License-Plate-Recognition/history_image"
-        plate_history = {}
-        
-        # Read plate history from file
-        if os.path.exists("D:/hoc_may/License-Plate-Recognition/plate_history.txt"):
-            with open("D:/hoc_may/License-Plate-Recognition/plate_history.txt", "r", encoding="utf-8") as f:
-                for line in f:
-                    filename, plate = line.strip().split(",")
-                    plate_history[filename] = plate
-        
-        image_count = 0
-        for file in sorted(os.listdir(image_dir), reverse=True):
-            if file.endswith('.jpg'):
-                plate = plate_history.get(file, "Không xác định")
-                self.image_treeview.insert("", "end", values=(file, plate), text=file)
-                image_count += 1
-        
-        # Load videos
-        video_dir = "D:/hoc_may/License-Plate-Recognition/history_video"
-        video_count = 0
-        
-        for file in sorted(os.listdir(video_dir), reverse=True):
-            if file.endswith('.mp4'):
-                date_str = self.get_date_from_filename(file)
-                duration = self.get_video_duration(os.path.join(video_dir, file))
-                self.video_treeview.insert("", "end", values=(date_str, duration), text=file)
-                video_count += 1
+        search_text = self.search_var.get().lower()
+        if search_text:
+            # Plate matches (prefix, substring, OCR-confusion aware fuzzy) from the search index
+            matched = {f for f in self.plate_index.search(search_text) if f in self.image_index}
+            # Date/time queries still match on the file name
+            if "_" in search_text or (search_text.isdigit() and len(search_text) >= 6):
+                matched.update(f for f in self.image_index.all() if search_text in f.lower())
+            self.image_filter = sorted(matched, key=sort_key, reverse=True)
+            self.video_filter = [f for f in self.video_index.all() if search_text in f.lower()]
+        else:
+            self.image_filter = None
+            self.video_filter = None
+        self.image_loaded = 0
+        self.video_loaded = 0
+        self.load_more_images()
+        self.load_more_videos()
         
         # Update history count
-        self.history_count.configure(text=str(image_count + video_count))
+        self.history_count.configure(text=str(len(self.image_index) + len(self.video_index)))
+
+    def next_page(self, index, filtered, loaded):
+        if filtered is not None:
+            return filtered[loaded:loaded + self.PAGE_SIZE]
+        return index.page(loaded, self.PAGE_SIZE)
+
+    def load_more_images(self):
+        """Append the next page of images to the list"""
+        files = self.next_page(self.image_index, self.image_filter, self.image_loaded)
+        plate_history = self.store.plates_for(files)
+        for file in files:
+            plate = plate_history.get(file, "Không xác định")
+            self.image_treeview.insert("", "end", values=(file, plate), text=file)
+        self.image_loaded += len(files)
+
+    def load_more_videos(self):
+        """Append the next page of videos to the list"""
+        video_dir = "D:/hoc_may/License-Plate-Recognition/history_video"
+        files = self.next_page(self.video_index, self.video_filter, self.video_loaded)
+        for file in files:
+            date_str = self.get_date_from_filename(file)
+            duration = self.get_video_duration(os.path.join(video_dir, file))
+            self.video_treeview.insert("", "end", values=(date_str, duration), text=file)
+        self.video_loaded += len(files)
+        get_cache(video_dir).save()
+
+    def on_image_scroll(self, first, last):
+        """Load older images lazily when the list is scrolled near its end"""
+        self.image_scrollbar.set(first, last)
+        total = len(self.image_filter) if self.image_filter is not None else len(self.image_index)
+        if float(last) > 0.95 and self.image_loaded < total:
+            self.load_more_images()
+
+    def on_video_scroll(self, first, last):
+        """Load older videos lazily when the list is scrolled near its end"""
+        self.video_scrollbar.set(first, last)
+        total = len(self.video_filter) if self.video_filter is not None else len(self.video_index)
+        if float(last) > 0.95 and self.video_loaded < total:
+            self.load_more_videos()
+
+    def add_history_image(self, file, plate):
+        """Insert a newly saved snapshot at the top of the image list"""
+        if file in self.image_index:
+            return
+        self.image_index.add(file)
+        if plate not in self.NO_PLATE:
+            self.plate_index.add(plate, file)
+        self.history_count.configure(text=str(len(self.image_index) + len(self.video_index)))
+        self.insert_image_row(file, plate)
+
+    def matches_search(self, file, plate):
+        """Same rules as filter_lists: folded plate match, or file name match for date/time queries"""
+        search_text = self.search_var.get().lower()
+        if plate not in self.NO_PLATE and PlateSearchIndex.matches(search_text, plate):
+            return True
+        is_date_query = "_" in search_text or (search_text.isdigit() and len(search_text) >= 6)
+        return is_date_query and search_text in file.lower()
+
+    def insert_image_row(self, file, plate):
+        """Insert one image row at the top of the list, respecting the search filter"""
+        if self.image_filter is not None:
+            if not self.matches_search(file, plate):
+                return
+            self.image_filter.insert(0, file)
+        self.image_treeview.insert("", 0, values=(file, plate), text=file)
+        self.image_loaded += 1
+
+    def sync_lists(self):
+        """Pick up files written outside the app (realtime snapshots, recorded videos)"""
+        # Snapshots from the writer are listed with their plate before the directory is rescanned
+        for snapshot in self.snapshot_writer.drain_saved():
+            self.add_history_image(snapshot.filename, snapshot.plate)
+        self.history_writer.flush()
+        added_images, removed_images = self.image_index.refresh()
+        added_videos, removed_videos = self.video_index.refresh()
+        if removed_images or removed_videos:
+            self.reload_lists()
+            return
+        plate_history = self.store.plates_for(added_images)
+        for file in added_images:
+            # A snapshot renamed after the drain above is listed with the plate from the writer
+            snapshot = self.snapshot_writer.unreported_snapshot(file)
+            plate = snapshot.plate if snapshot is not None else plate_history.get(file, "Không xác định")
+            if plate not in self.NO_PLATE:
+                self.plate_index.add(plate, file)
+            self.insert_image_row(file, plate)
+        video_dir = "D:/hoc_may/License-Plate-Recognition/history_video"
+        search_text = self.search_var.get().lower()
+        for file in added_videos:
+            if self.video_filter is not None:
+                if search_text not in file.lower():
+                    continue
+                self.video_filter.insert(0, file)
+            date_str = self.get_date_from_filename(file)
+            duration = self.get_video_duration(os.path.join(video_dir, file))
+            self.video_treeview.insert("", 0, values=(date_str, duration), text=file)
+            self.video_loaded += 1
+        if added_videos:
+            get_cache(video_dir).save()
+        self.history_count.configure(text=str(len(self.image_index) + len(self.video_index)))
+
+    def record_snapshot(self, snapshot):
+        """Save a written snapshot to the detection store (runs on the snapshot writer thread)"""
+        self.history_writer.add(snapshot.filename, snapshot.plate, camera=snapshot.camera,
+                                source=snapshot.source, ts=snapshot.ts, confidence=snapshot.confidence)
+
+    def poll_snapshots(self):
+        """Add snapshots written in the background to the image list"""
+        for snapshot in self.snapshot_writer.drain_saved():
+            self.add_history_image(snapshot.filename, snapshot.plate)
+        self.root.after(200, self.poll_snapshots)
+
+    def schedule_sync(self):
+        """Keep the lists in sync with the history directories"""
+        self.sync_lists()
+        self.root.after(10000, self.schedule_sync)
 
     def display_selected_file(self, event):
         """Display selected image or play selected video on canvas"""
@@ -738,7 +865,7 @@ class ModernLicensePlateApp:
         # Run in a separate thread to avoid UI freezing
         def start_realtime_thread():
             try:
-                self.realtime_generator = process_realtime(cam_source)
+                self.realtime_generator = process_realtime(cam_source, snapshots=self.snapshot_writer)
                 self.root.after(100, self.update_realtime)
             except Exception as e:
                 self.is_realtime_running = False
@@ -752,11 +879,11 @@ class ModernLicensePlateApp:
         """Update UI with real-time detection results"""
         if not self.is_realtime_running:
             self.status_indicator.configure(text="⬤ Đã dừng real-time", text_color="#757575")
-            self.update_file_lists()
+            self.sync_lists()
             return
             
         try:
-            captured_frame, current_plate = next(self.realtime_generator)
+            captured_frame, current_plate, confidence = next(self.realtime_generator)
             if captured_frame is not None:
                 self.update_canvas(captured_frame)
                 
@@ -768,23 +895,15 @@ class ModernLicensePlateApp:
                     current_time = datetime.datetime.now().strftime("%H:%M:%S")
                     self.time_label.configure(text=f"Thời gian: {current_time}")
                     
-                    # Save image and plate number
-                    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-                    output_filename = f"{current_plate}_{timestamp}.jpg"
-                    output_path = os.path.join("D:/hoc_may/License-Plate-Recognition/history_image", output_filename)
-                    cv2.imwrite(output_path, captured_frame)
+                    # Fused confidence of the track across frames
+                    if confidence is not None:
+                        self.confidence_label.configure(text=f"Độ chính xác: {confidence:.0%}")
                     
-                    # Save plate number to history file
-                    with open("D:/hoc_may/License-Plate-Recognition/plate_history.txt", "a", encoding="utf-8") as f:
-                        f.write(f"{output_filename},{current_plate}\n")
+                    # The snapshot itself is saved by the snapshot writer (see poll_snapshots)
                     
                     # Add to detection history
                     if current_plate not in self.detection_history:
                         self.detection_history.append(current_plate)
-                        self.confidence_label.configure(text="Độ chính xác: 97%")  # Placeholder
-                        
-                        # Update lists after new detection
-                        self.update_file_lists()
             
         except StopIteration:
             self.is_realtime_running = False
@@ -839,15 +958,9 @@ class ModernLicensePlateApp:
                             self.update_canvas(img)
                             plate = next(iter(plates)) if plates else "Không tìm thấy biển số"
                             
-                            # Save image and plate number
-                            timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-                            output_filename = f"{plate}_{timestamp}.jpg"
-                            output_path = os.path.join("D:/hoc_may/License-Plate-Recognition/history_image", output_filename)
-                            cv2.imwrite(output_path, captured_frame)
-                            
-                            # Save plate number to history file
-                            with open("D:/hoc_may/License-Plate-Recognition/plate_history.txt", "a", encoding="utf-8") as f:
-                                f.write(f"{output_filename},{plate}\n")
+                            # Save image and plate number in the background
+                            snapshot = captured_frame if captured_frame is not None else img
+                            self.snapshot_writer.submit(snapshot, plate, source="image", dedup=False)
                             
                             self.plate_label.configure(text=plate)
                             self.status_indicator.configure(text="⬤ Hoàn tất xử lý", text_color="#4caf50")
@@ -857,9 +970,6 @@ class ModernLicensePlateApp:
                             
                             # Update confidence (placeholder)
                             self.confidence_label.configure(text="Độ chính xác: 96%")
-                            
-                            # Update lists
-                            self.update_file_lists()
                         else:
                             messagebox.showerror("Lỗi", "Không thể đọc ảnh")
                             self.status_indicator.configure(text="⬤ Lỗi xử lý", text_color="#f44336")
@@ -899,7 +1009,7 @@ class ModernLicensePlateApp:
                         self.time_label.configure(text=f"Thời gian: {datetime.datetime.now().strftime('%H:%M:%S')}")
                         
                         # Update lists
-                        self.update_file_lists()
+                        self.sync_lists()
                     
                     # Schedule UI update on main thread
                     self.root.after(0, update_ui)
@@ -915,71 +1025,80 @@ class ModernLicensePlateApp:
             threading.Thread(target=process_video_thread).start()
     
     def export_report(self):
-        """Export detection results to a report file"""
+        """Export detection results to a report file in the background"""
         # Get current date for filename
         today = datetime.datetime.now().strftime("%Y%m%d")
         filename = f"bao_cao_bien_so_{today}.txt"
         
         file_path = filedialog.asksaveasfilename(
             defaultextension=".txt",
-            filetypes=[("Text files", "*.txt"), ("All files", "*.*")],
+            filetypes=[("Text files", "*.txt"), ("CSV files", "*.csv"), ("Parquet files", "*.parquet"), ("All files", "*.*")],
             initialfile=filename,
             title="Lưu báo cáo"
         )
         
         if not file_path:
             return
-            
+        
+        # Optional date range and plate filters
+        date_range = simpledialog.askstring(
+            "Khoảng thời gian",
+            "Từ ngày - đến ngày (dd/mm/yyyy - dd/mm/yyyy), để trống để xuất tất cả:",
+            parent=self.root
+        )
         try:
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write("BÁO CÁO NHẬN DIỆN BIỂN SỐ XE\n")
-                f.write("=" * 40 + "\n\n")
-                f.write(f"Ngày xuất báo cáo: {datetime.datetime.now().strftime('%d/%m/%Y %H:%M:%S')}\n\n")
-                
-                # Write image detections
-                f.write("DANH SÁCH BIỂN SỐ NHẬN DIỆN TỪ HÌNH ẢNH:\n")
-                f.write("-" * 40 + "\n")
-                
-                image_dir = "D:/hoc_may/License-Plate-Recognition/history_image"
-                plate_history = {}
-                if os.path.exists("D:/hoc_may/License-Plate-Recognition/plate_history.txt"):
-                    with open("D:/hoc_may/License-Plate-Recognition/plate_history.txt", "r", encoding="utf-8") as pf:
-                        for line in pf:
-                            filename, plate = line.strip().split(",")
-                            plate_history[filename] = plate
-                
-                for file in sorted(os.listdir(image_dir), reverse=True):
-                    if file.endswith('.jpg'):
-                        plate = plate_history.get(file, "Không xác định")
-                        date_str = self.get_date_from_filename(file)
-                        f.write(f"Tên file: {file}\n")
-                        f.write(f"Biển số: {plate}\n")
-                        f.write(f"Thời gian: {date_str}\n")
-                        f.write("-" * 40 + "\n")
-                
-                # Write video detections
-                f.write("\nDANH SÁCH BIỂN SỐ NHẬN DIỆN TỪ VIDEO:\n")
-                f.write("-" * 40 + "\n")
-                
-                video_dir = "D:/hoc_may/License-Plate-Recognition/history_video"
-                for file in sorted(os.listdir(video_dir), reverse=True):
-                    if file.endswith('.mp4'):
-                        date_str = self.get_date_from_filename(file)
-                        duration = self.get_video_duration(os.path.join(video_dir, file))
-                        f.write(f"Video: {file}\n")
-                        f.write(f"Ngày: {date_str}\n")
-                        f.write(f"Thời lượng: {duration}\n")
-                        f.write("-" * 40 + "\n")
-            
-            messagebox.showinfo("Thành công", f"Đã xuất báo cáo thành công: {file_path}")
-            
-        except Exception as e:
-            messagebox.showerror("Lỗi", f"Không thể xuất báo cáo: {str(e)}")
+            since, until = self.parse_date_range(date_range)
+        except ValueError:
+            messagebox.showerror("Lỗi", "Khoảng thời gian không hợp lệ")
+            return
+        camera = simpledialog.askstring(
+            "Camera",
+            "Nguồn camera (đúng như đã nhập khi chạy real-time), để trống để xuất tất cả:",
+            parent=self.root
+        )
+        plate = simpledialog.askstring(
+            "Biển số",
+            "Biển số cần xuất (chính xác, ví dụ 51F-123.45), để trống để xuất tất cả:",
+            parent=self.root
+        )
+        camera = (camera or "").strip() or None
+        plate = (plate or "").strip() or None
+        
+        def on_progress(done, total):
+            self.root.after(0, lambda: self.status_indicator.configure(
+                text=f"⬤ Đang xuất báo cáo {done}/{total}", text_color="#fb8c00"))
+        
+        def on_done(count, error):
+            def update_ui():
+                if error is None:
+                    self.status_indicator.configure(text="⬤ Sẵn sàng", text_color=self.accent_color)
+                    messagebox.showinfo("Thành công", f"Đã xuất báo cáo thành công ({count} dòng): {file_path}")
+                else:
+                    self.status_indicator.configure(text="⬤ Lỗi xuất báo cáo", text_color="#f44336")
+                    messagebox.showerror("Lỗi", f"Không thể xuất báo cáo: {str(error)}")
+            self.root.after(0, update_ui)
+        
+        self.history_writer.flush()
+        ExportJob(
+            self.store, file_path, on_done=on_done, since=since, until=until, camera=camera, plate=plate,
+            video_dir="D:/hoc_may/License-Plate-Recognition/history_video", progress=on_progress
+        ).start()
+
+    def parse_date_range(self, text):
+        """Parse 'dd/mm/yyyy - dd/mm/yyyy' into (since, until) timestamps, until is exclusive"""
+        if not text or not text.strip():
+            return None, None
+        parts = [p.strip() for p in text.split("-")]
+        start = datetime.datetime.strptime(parts[0], "%d/%m/%Y")
+        end = datetime.datetime.strptime(parts[-1], "%d/%m/%Y") + datetime.timedelta(days=1)
+        return start.timestamp(), end.timestamp()
     
     def destroy(self):
         """Clean up resources before closing"""
         self.stop_video()
         self.is_realtime_running = False
+        self.snapshot_writer.flush()
+        self.history_writer.close()
         self.root.destroy()
 
 if __name__ == "__main__":
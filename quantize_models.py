@@ -0,0 +1,115 @@
+import argparse
+import glob
+import json
+import os
+import shutil
+import time
+
+import cv2
+import numpy as np
+
+import app_utils.models as models
+from app_utils.backends import batch_shape, letterbox, names_path
+from function.helper import read_plate, to_numpy
+
+class ImageCalibrationReader:
+    # feeds letterboxed calibration images to onnxruntime's static quantizer
+    def __init__(self, images, input_name, size=640):
+        self.images = iter(images)
+        self.input_name = input_name
+        self.size = size
+
+    def get_next(self):
+        img = next(self.images, None)
+        if img is None:
+            return None
+        # same rectangular shape the dynamic model sees at inference time
+        padded, _, _ = letterbox(img, batch_shape([img], self.size))
+        return {self.input_name: (padded.transpose(2, 0, 1)[None] / 255.0).astype(np.float32)}
+
+    def rewind(self):
+        pass
+
+def load_images(pattern, limit):
+    for path in sorted(glob.glob(pattern))[:limit]:
+        img = cv2.imread(path)
+        if img is not None:
+            yield path, img
+
+def plate_crops(frames, backend="onnx"):
+    # calibration / evaluation data for the OCR model: plates found by the FP32 detector
+    detector = models.get_detector(backend)
+    for path, img in frames:
+        for box in to_numpy(detector(img, size=640).xyxy[0]):
+            x1, y1, x2, y2 = (max(int(v), 0) for v in box[:4])
+            crop = img[y1:y2, x1:x2]
+            if crop.size > 0:
+                yield path, crop
+
+def quantize(name, calibration, mode):
+    from onnxruntime.quantization import QuantFormat, QuantType, quantize_dynamic, quantize_static
+    src = models.exported_path(name, "onnx")
+    dst = models.exported_path(name, "onnx_int8")
+    if mode == "dynamic":
+        quantize_dynamic(src, dst, weight_type=QuantType.QInt8)
+    else:
+        import onnxruntime as ort
+        input_name = ort.InferenceSession(src, providers=["CPUExecutionProvider"]).get_inputs()[0].name
+        reader = ImageCalibrationReader(calibration, input_name)
+        quantize_static(src, dst, reader, quant_format=QuantFormat.QDQ,
+                        activation_type=QuantType.QUInt8, weight_type=QuantType.QInt8, per_channel=True)
+    shutil.copyfile(names_path(src), names_path(dst))
+    print(f"quantized {name} ({mode}) -> {dst}")
+
+def latency_ms(fn, items, repeat=1):
+    times = []
+    for _ in range(repeat):
+        for item in items:
+            start = time.perf_counter()
+            fn(item)
+            times.append((time.perf_counter() - start) * 1000)
+    return float(np.median(times)) if times else 0.0
+
+def report(frames, crops, backends):
+    # accuracy of read_plate strings against the first backend and median latency per call
+    baseline = backends[0]
+    reference = [read_plate(models.get_ocr(baseline), crop) for _, crop in crops]
+    rows = []
+    for backend in backends:
+        detector = models.get_detector(backend)
+        ocr = models.get_ocr(backend)
+        strings = [read_plate(ocr, crop) for _, crop in crops]
+        rows.append({
+            "backend": backend,
+            "detector_ms": round(latency_ms(lambda img: detector(img, size=640), [img for _, img in frames]), 2),
+            "ocr_ms": round(latency_ms(lambda crop: read_plate(ocr, crop), [crop for _, crop in crops]), 2),
+            "same_as_baseline": sum(a == b for a, b in zip(reference, strings)),
+            "plates": len(crops),
+        })
+    print(f"{'backend':<12}{'detector ms':>12}{'ocr ms':>10}{'agreement':>12}")
+    for row in rows:
+        print(f"{row['backend']:<12}{row['detector_ms']:>12}{row['ocr_ms']:>10}"
+              f"{row['same_as_baseline']:>7}/{row['plates']:<4} (vs {baseline})")
+    return rows
+
+def main():
+    ap = argparse.ArgumentParser(description='build INT8 variants of the exported ONNX models and compare them with FP32')
+    ap.add_argument('--calib', default=os.path.join(models.BASE_DIR, 'history_image', '*.jpg'), help='calibration images')
+    ap.add_argument('--eval', default=os.path.join(models.BASE_DIR, 'result', '*.jpg'), help='evaluation images for the report')
+    ap.add_argument('--limit', type=int, default=200, help='max number of calibration images')
+    ap.add_argument('--mode', choices=['static', 'dynamic'], default='static')
+    ap.add_argument('--report', default=None, help='save the comparison as JSON')
+    args = ap.parse_args()
+
+    quantize("detector", (img for _, img in load_images(args.calib, args.limit)), args.mode)
+    quantize("ocr", (crop for _, crop in plate_crops(load_images(args.calib, args.limit))), args.mode)
+
+    frames = list(load_images(args.eval, args.limit))
+    crops = list(plate_crops(frames))
+    rows = report(frames, crops, ["torch", "onnx", "onnx_int8"])
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,5 @@
 from PIL import Image
 import cv2
-import torch
 import math 
 import function.utils_rotate as utils_rotate
 from IPython.display import display
@@ -8,44 +7,54 @@ import os
 import time
 import argparse
 import function.helper as helper
+import app_utils.models as models
+from app_utils.debug_crops import debug_crops
+from function.tracker import PlateTracker
+from function.motion import MotionGate
 
 # load model
-yolo_LP_detect = torch.hub.load('yolov5', 'custom', path='model/LP_detector_nano_61.pt', force_reload=True, source='local')
-yolo_license_plate = torch.hub.load('yolov5', 'custom', path='model/LP_ocr_nano_62.pt', force_reload=True, source='local')
-yolo_license_plate.conf = 0.60
+yolo_LP_detect = models.get_detector()
+yolo_license_plate = models.get_ocr()
 
 prev_frame_time = 0
 new_frame_time = 0
 
+tracker = PlateTracker()
+motion_gate = MotionGate()
+
 vid = cv2.VideoCapture(1)
 # vid = cv2.VideoCapture("1.mp4")
 while(True):
     ret, frame = vid.read()
     
-    plates = yolo_LP_detect(frame, size=640)
-    list_plates = plates.pandas().xyxy[0].values.tolist()
-    list_read_plates = set()
-    for plate in list_plates:
-        flag = 0
-        x = int(plate[0]) # xmin
-        y = int(plate[1]) # ymin
-        w = int(plate[2] - plate[0]) # xmax - xmin
-        h = int(plate[3] - plate[1]) # ymax - ymin  
-        crop_img = frame[y:y+h, x:x+w]
-        cv2.rectangle(frame, (int(plate[0]),int(plate[1])), (int(plate[2]),int(plate[3])), color = (0,0,225), thickness = 2)
-        cv2.imwrite("crop.jpg", crop_img)
-        rc_image = cv2.imread("crop.jpg")
-        lp = ""
-        for cc in range(0,2):
-            for ct in range(0,2):
-                lp = helper.read_plate(yolo_license_plate, utils_rotate.deskew(crop_img, cc, ct))
+    # skip detection and OCR while the scene is static, the last seen tracks are still drawn
+    moving = motion_gate(frame)
+    if moving:
+        plates = yolo_LP_detect(frame, size=640)
+        list_plates = helper.to_numpy(plates.xyxy[0]).tolist()
+        tracks = tracker.update(list_plates)
+    else:
+        tracks = tracker.visible()
+    # only new tracks (or every tracker.ocr_interval frames) are sent to OCR
+    for track in tracks:
+        if moving and tracker.needs_ocr(track):
+            x1, y1, x2, y2 = (int(v) for v in track.bbox)
+            crop_img = frame[max(y1, 0):y2, max(x1, 0):x2].copy()
+            debug_crops.submit(crop_img, track.id)
+            lp, lines = "unknown", None
+            for cc in range(0,2):
+                for ct in range(0,2):
+                    lp, lines = helper.read_plate(yolo_license_plate, utils_rotate.deskew(crop_img, cc, ct), detail=True)
+                    if lp != "unknown":
+                        break
                 if lp != "unknown":
-                    list_read_plates.add(lp)
-                    cv2.putText(frame, lp, (int(plate[0]), int(plate[1]-10)), cv2.FONT_HERSHEY_SIMPLEX, 0.9, (36,255,12), 2)
-                    flag = 1
                     break
-            if flag == 1:
-                break
+            track.add_reading(lp, lines)
+    for track in tracks:
+        x1, y1, x2, y2 = (int(v) for v in track.bbox)
+        cv2.rectangle(frame, (x1, y1), (x2, y2), color = (0,0,225), thickness = 2)
+        if track.plate is not None:
+            cv2.putText(frame, track.plate, (x1, y1-10), cv2.FONT_HERSHEY_SIMPLEX, 0.9, (36,255,12), 2)
     new_frame_time = time.time()
     fps = 1/(new_frame_time-prev_frame_time)
     prev_frame_time = new_frame_time